@@ -0,0 +1,62 @@
+"""add gpa rollups
+
+Revision ID: 3c0ab035714c
+Revises: 6a08c49752e7
+Create Date: 2026-10-17 15:02:44.183920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c0ab035714c'
+down_revision = '6a08c49752e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'gpa_rollups',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('quiz_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.Enum('hour', 'day', name='rollup_granularity'), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('correct_answers', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('number_of_questions', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('company_id', 'user_id', 'quiz_id', 'granularity', 'bucket_start')
+    )
+    op.create_index('ix_gpa_rollups_company_id_bucket_start', 'gpa_rollups', ['company_id', 'bucket_start'])
+    op.create_index('ix_gpa_rollups_user_id_bucket_start', 'gpa_rollups', ['user_id', 'bucket_start'])
+    op.create_index('ix_gpa_rollups_granularity_bucket_start', 'gpa_rollups', ['granularity', 'bucket_start'])
+
+    # Backfill from every recorded attempt: the last two days hourly, whole days before that,
+    # as the compactor would have left them with the default GPA_ROLLUP_HOURLY_RETENTION_HOURS
+    op.execute(
+        "INSERT INTO gpa_rollups (company_id, user_id, quiz_id, granularity, bucket_start, "
+        "attempts, correct_answers, number_of_questions) "
+        "SELECT company_id, user_id, quiz_id, granularity::rollup_granularity, date_trunc(granularity, passed), "
+        "count(*), coalesce(sum(correct_answers), 0), coalesce(sum(number_of_questions), 0) "
+        "FROM (SELECT general_results.company_id, general_results.user_id, quizzes_results.quiz_id, "
+        "quizzes_results.correct_answers, quizzes_results.number_of_questions, "
+        "timezone('UTC', quizzes_results.date_of_passage) AS passed, "
+        "CASE WHEN timezone('UTC', quizzes_results.date_of_passage) >= "
+        "date_trunc('day', timezone('UTC', now()) - interval '48 hours') THEN 'hour' ELSE 'day' END AS granularity "
+        "FROM quizzes_results JOIN general_results ON general_results.id = quizzes_results.general_result_id "
+        "WHERE general_results.company_id IS NOT NULL AND general_results.user_id IS NOT NULL "
+        "AND quizzes_results.quiz_id IS NOT NULL AND quizzes_results.date_of_passage IS NOT NULL) AS attempts "
+        "GROUP BY company_id, user_id, quiz_id, granularity, date_trunc(granularity, passed)"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_gpa_rollups_granularity_bucket_start', table_name='gpa_rollups')
+    op.drop_index('ix_gpa_rollups_user_id_bucket_start', table_name='gpa_rollups')
+    op.drop_index('ix_gpa_rollups_company_id_bucket_start', table_name='gpa_rollups')
+    op.drop_table('gpa_rollups')
+    sa.Enum(name='rollup_granularity').drop(op.get_bind())
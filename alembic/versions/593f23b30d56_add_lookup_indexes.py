@@ -0,0 +1,42 @@
+"""add lookup indexes
+
+Revision ID: 593f23b30d56
+Revises: 3542c3bb1720
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '593f23b30d56'
+down_revision = '3542c3bb1720'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_workers_user_id_company_id_role', 'workers', ['user_id', 'company_id', 'role']),
+    ('ix_workers_company_id_role', 'workers', ['company_id', 'role']),
+    ('ix_requests_company_id_status_request_from', 'requests', ['company_id', 'status', 'request_from']),
+    ('ix_requests_user_id_company_id', 'requests', ['user_id', 'company_id']),
+    ('ix_general_results_user_id_company_id', 'general_results', ['user_id', 'company_id']),
+    ('ix_general_results_company_id_update_date', 'general_results', ['company_id', 'update_date']),
+    ('ix_quizzes_results_general_result_id_date_of_passage', 'quizzes_results', ['general_result_id', 'date_of_passage']),
+    ('ix_questions_quiz_id', 'questions', ['quiz_id']),
+    ('ix_answers_question_id_is_correct', 'answers', ['question_id', 'is_correct']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,47 @@
+"""add gpa running totals
+
+Revision ID: 6a08c49752e7
+Revises: 946559a110a4
+Create Date: 2026-10-17 13:20:37.604112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a08c49752e7'
+down_revision = '946559a110a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('quizzes_results', sa.Column('number_of_questions', sa.Integer(), nullable=True))
+    op.add_column(
+        'general_results', sa.Column('correct_answers', sa.Integer(), server_default='0', nullable=False)
+    )
+    op.add_column(
+        'general_results', sa.Column('number_of_questions', sa.Integer(), server_default='0', nullable=False)
+    )
+
+    # Best available snapshot for past attempts is the quiz's current size
+    op.execute(
+        "UPDATE quizzes_results SET number_of_questions = quizzes.number_of_questions "
+        "FROM quizzes WHERE quizzes.id = quizzes_results.quiz_id"
+    )
+    op.execute(
+        "UPDATE general_results SET correct_answers = totals.correct_answers, "
+        "number_of_questions = totals.number_of_questions "
+        "FROM (SELECT general_result_id, "
+        "coalesce(sum(correct_answers), 0) AS correct_answers, "
+        "coalesce(sum(number_of_questions), 0) AS number_of_questions "
+        "FROM quizzes_results GROUP BY general_result_id) AS totals "
+        "WHERE totals.general_result_id = general_results.id"
+    )
+
+
+def downgrade():
+    op.drop_column('general_results', 'number_of_questions')
+    op.drop_column('general_results', 'correct_answers')
+    op.drop_column('quizzes_results', 'number_of_questions')
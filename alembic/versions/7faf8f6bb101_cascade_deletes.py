@@ -0,0 +1,57 @@
+"""cascade deletes
+
+Revision ID: 7faf8f6bb101
+Revises: 593f23b30d56
+Create Date: 2026-10-17 11:02:18.530417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7faf8f6bb101'
+down_revision = '593f23b30d56'
+branch_labels = None
+depends_on = None
+
+
+FOREIGN_KEYS = [
+    ('workers', 'user_id', 'users', 'CASCADE'),
+    ('workers', 'company_id', 'companies', 'CASCADE'),
+    ('requests', 'user_id', 'users', 'CASCADE'),
+    ('requests', 'company_id', 'companies', 'CASCADE'),
+    ('quizzes', 'company_id', 'companies', 'CASCADE'),
+    ('questions', 'quiz_id', 'quizzes', 'CASCADE'),
+    ('answers', 'question_id', 'questions', 'CASCADE'),
+    ('general_results', 'user_id', 'users', 'CASCADE'),
+    ('general_results', 'company_id', 'companies', 'CASCADE'),
+    # Scored attempts outlive their quiz: they are part of the general result's running totals
+    ('quizzes_results', 'quiz_id', 'quizzes', 'SET NULL'),
+    ('quizzes_results', 'general_result_id', 'general_results', 'CASCADE'),
+]
+
+
+def replace_foreign_keys(cascade: bool):
+    for table, column, referred_table, on_delete in FOREIGN_KEYS:
+        # Postgres' default name for the unnamed constraints created in 3542c3bb1720
+        name = f"{table}_{column}_fkey"
+        action = f"ON DELETE {on_delete}" if cascade else ""
+        # NOT VALID skips the scan of existing rows, so the swap only holds its lock briefly
+        op.execute(
+            f"ALTER TABLE {table} DROP CONSTRAINT {name}, "
+            f"ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {referred_table} (id) {action} NOT VALID"
+        )
+
+    # The scan happens here, after the swap has committed, under a lock that does not block writes
+    with op.get_context().autocommit_block():
+        for table, column, _, _ in FOREIGN_KEYS:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey")
+
+
+def upgrade():
+    replace_foreign_keys(cascade=True)
+
+
+def downgrade():
+    replace_foreign_keys(cascade=False)
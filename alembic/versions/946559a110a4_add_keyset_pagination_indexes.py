@@ -0,0 +1,36 @@
+"""add keyset pagination indexes
+
+Revision ID: 946559a110a4
+Revises: 7faf8f6bb101
+Create Date: 2026-10-17 11:48:05.271903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '946559a110a4'
+down_revision = '7faf8f6bb101'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_users_date_created_id', 'users', ['date_created', 'id']),
+    ('ix_companies_hidden_id', 'companies', ['hidden', 'id']),
+    ('ix_quizzes_company_id_id', 'quizzes', ['company_id', 'id']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
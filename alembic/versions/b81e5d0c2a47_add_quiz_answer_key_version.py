@@ -0,0 +1,26 @@
+"""add quiz answer key version
+
+Revision ID: b81e5d0c2a47
+Revises: 3c0ab035714c
+Create Date: 2026-10-18 10:12:31.540771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81e5d0c2a47'
+down_revision = '3c0ab035714c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'quizzes', sa.Column('answer_key_version', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade():
+    op.drop_column('quizzes', 'answer_key_version')
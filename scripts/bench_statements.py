@@ -0,0 +1,110 @@
+"""Per-call Python overhead of the hot CRUD lookups: select() rebuilt on every call vs lambda_stmt.
+
+    python -m scripts.bench_statements --iterations 20000
+
+Both variants run against the same in-memory SQLite database with the real
+models, so the database work is identical and tiny; the difference between the
+columns is statement construction and cache-key generation, which is what the
+lambda statements in src/crud skip once their first call has been cached.
+"""
+import argparse
+import time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+from src import models
+from src.crud.criteria import IS_OWNER_OR_ADMIN
+from src.database import Base
+from src.models.worker import Role
+
+EMAIL = "bench@example.com"
+
+
+def user_by_email_select(email: str):
+    return select(models.User).filter(models.User.email == email)
+
+
+def user_by_email_lambda(email: str):
+    return lambda_stmt(lambda: select(models.User).filter(models.User.email == email))
+
+
+def worker_select(user_id: int, company_id: int):
+    return select(models.Worker).filter(
+        (models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)
+    )
+
+
+def worker_lambda(user_id: int, company_id: int):
+    return lambda_stmt(lambda: select(models.Worker).filter(
+        (models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)
+    ))
+
+
+def quiz_select(quiz_id: int):
+    return select(models.Quiz).filter(models.Quiz.id == quiz_id)
+
+
+def quiz_lambda(quiz_id: int):
+    return lambda_stmt(lambda: select(models.Quiz).filter(models.Quiz.id == quiz_id))
+
+
+def main_role_select(user_id: int, company_id: int):
+    return select(models.User).join(models.Worker).filter(
+        ((models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)) &
+        ((models.Worker.role == Role.owner) | (models.Worker.role == Role.admin))
+    )
+
+
+def main_role_lambda(user_id: int, company_id: int):
+    return lambda_stmt(lambda: select(models.User).join(models.Worker).filter(
+        ((models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)) & IS_OWNER_OR_ADMIN
+    ))
+
+
+CASES: Dict[str, Tuple[Callable, Callable, tuple]] = {
+    "get_user_by_email": (user_by_email_select, user_by_email_lambda, (EMAIL,)),
+    "get_worker_by_user_id_and_company_id": (worker_select, worker_lambda, (1, 1)),
+    "get_quiz_by_id": (quiz_select, quiz_lambda, (1,)),
+    "check_main_role_by_user_id_and_company_id": (main_role_select, main_role_lambda, (1, 1)),
+}
+
+
+def seed(session: Session):
+    user = models.User(email=EMAIL)
+    company = models.Company(title="Bench")
+    session.add_all([user, company])
+    session.flush()
+    session.add_all([
+        models.Worker(user_id=user.id, company_id=company.id, role=Role.owner),
+        models.Quiz(company_id=company.id, title="Bench", number_of_questions=0)
+    ])
+    session.commit()
+
+
+def run(session: Session, build: Callable, args: tuple, iterations: int) -> float:
+    session.execute(build(*args)).scalars().first()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        session.execute(build(*args)).scalars().first()
+        session.expunge_all()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(args: argparse.Namespace):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session)
+        print(f"{'lookup':<45}{'select() us':>14}{'lambda us':>12}{'saved':>8}")
+        for name, (build_select, build_lambda, call_args) in CASES.items():
+            select_us = run(session, build_select, call_args, args.iterations)
+            lambda_us = run(session, build_lambda, call_args, args.iterations)
+            print(f"{name:<45}{select_us:>14.1f}{lambda_us:>12.1f}{1 - lambda_us / select_us:>8.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10000)
+    main(parser.parse_args())
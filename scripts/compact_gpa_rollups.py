@@ -0,0 +1,31 @@
+"""Fold hourly GPA rollups into daily ones, the same pass the API runs every
+GPA_ROLLUP_COMPACT_INTERVAL_SECONDS.
+
+    python -m scripts.compact_gpa_rollups
+    python -m scripts.compact_gpa_rollups --before 2026-10-01
+
+By default everything older than GPA_ROLLUP_HOURLY_RETENTION_HOURS, rounded down
+to a whole day, is compacted. Safe to run next to the in-process compactor and
+while submissions come in: each hour moves in the same statement that deletes it.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from src.database import SessionLocal, engine
+from src.rollups import compact_rollups, compaction_cutoff
+
+
+async def main(args: argparse.Namespace):
+    cutoff = compaction_cutoff() if args.before is None else datetime.fromisoformat(args.before)
+    async with SessionLocal() as session:
+        compacted = await compact_rollups(session, cutoff=cutoff)
+        await session.commit()
+    await engine.dispose()
+    print(f"compacted hourly buckets before {cutoff.isoformat()} into {compacted} daily buckets")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--before", default=None, help="compact hourly buckets before this UTC date instead")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,272 @@
+"""EXPLAIN every hot CRUD lookup and fail if any of them needs a sequential scan.
+
+    python -m scripts.explain_queries --seed 50000
+
+The statements are not copies: each lookup below calls the real CRUD method
+against a RecordingSession, which keeps whatever the method executes (plain
+selects and lambda_stmt alike) and hands back empty results. Those statements,
+with the parameters they were built with, are then EXPLAINed on Postgres.
+
+--seed fills an empty database with synthetic tenants first. By default the
+planner runs with enable_seqscan=off, so a Seq Scan in a plan means no usable
+index exists for that query, not just that the table is small.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.expression import ClauseElement
+
+from src import models
+from src.cache import caches
+from src.config import Config
+from src.crud import CompanyCRUD, LeaderboardCrud, ManagementCRUD, QuizCrud, UserCRUD, WorkflowCrud
+from src.pagination import CursorParams, encode_cursor
+
+USER_ID = 1
+COMPANY_ID = 1
+QUIZ_ID = 1
+QUESTION_ID = 1
+EMAIL = "seed-1@example.com"
+
+# Stands in for any row a lookup expects to find, so methods go on to their next statement
+FOUND = object()
+
+
+class RecordingResult:
+
+    def scalars(self) -> "RecordingResult":
+        return self
+
+    def unique(self) -> "RecordingResult":
+        return self
+
+    def first(self) -> Any:
+        return FOUND
+
+    def all(self) -> List[Any]:
+        return list()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(())
+
+
+class RecordingSession:
+    # Takes the place of AsyncSession in the CRUD classes and keeps every statement they execute
+
+    def __init__(self):
+        self.info: Dict[str, Any] = dict()
+        self.statements: List[Executable] = list()
+
+    async def execute(self, statement: Executable, *args, **kwargs) -> RecordingResult:
+        self.statements.append(statement)
+        return RecordingResult()
+
+    async def scalar(self, statement: Executable, *args, **kwargs) -> Any:
+        self.statements.append(statement)
+        return None
+
+
+class EmptyRedis:
+    # Every cache lookup misses, so the cached lookups reach the database
+
+    async def get(self, key: str) -> None:
+        return None
+
+    async def set(self, *args, **kwargs):
+        pass
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Executable):
+        self.statement = statement
+
+
+@compiles(Explain)
+def compile_explain(element: Explain, compiler, **kwargs) -> str:
+    # Compiled with the statement's own bind parameters, which a lambda_stmt cannot render as literals
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kwargs)}"
+
+
+def lookups(db: RecordingSession) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    users = UserCRUD(db=db)
+    companies = CompanyCRUD(db=db, redis=EmptyRedis())
+    quizzes = QuizCrud(db=db, company_crud=companies)
+    management = ManagementCRUD(db=db, company_crud=companies, user_crud=users)
+    leaderboards = LeaderboardCrud(db=db, redis=EmptyRedis(), company_crud=companies)
+    workflow = WorkflowCrud(
+        db=db, redis=EmptyRedis(), quiz_crud=quizzes, company_crud=companies, user_crud=users,
+        leaderboard_crud=leaderboards
+    )
+    since = datetime.utcnow() - timedelta(hours=24)
+
+    def cursor(*values: Any) -> CursorParams:
+        return CursorParams(cursor=encode_cursor(values), size=50, include_total=False)
+
+    return {
+        "UserCRUD.get_user_by_email": lambda: users.get_user_by_email(email=EMAIL),
+        "UserCRUD.get_user_identity_by_email": lambda: users.get_user_identity_by_email(email=EMAIL),
+        "UserCRUD.get_users_by_cursor": lambda: users.get_users_by_cursor(params=cursor(since, USER_ID)),
+        "CompanyCRUD.get_companies_by_user_id": lambda: companies.get_companies_by_user_id(user_id=USER_ID),
+        "CompanyCRUD.get_workers_by_company_id": lambda: companies.get_workers_by_company_id(company_id=COMPANY_ID),
+        "CompanyCRUD.get_owner_by_company_id": lambda: companies.get_owner_by_company_id(company_id=COMPANY_ID),
+        "CompanyCRUD.get_company_where_im_owner_or_admin_by_company_id":
+            lambda: companies.get_company_where_im_owner_or_admin_by_company_id(
+                company_id=COMPANY_ID, user_id=USER_ID
+            ),
+        "CompanyCRUD.check_owner_or_admin":
+            lambda: companies.check_owner_or_admin(company_id=COMPANY_ID, user_id=USER_ID),
+        "CompanyCRUD.get_worker_by_user_id_and_company_id":
+            lambda: companies.get_worker_by_user_id_and_company_id(user_id=USER_ID, company_id=COMPANY_ID),
+        "CompanyCRUD.get_public_companies_by_cursor":
+            lambda: companies.get_public_companies_by_cursor(params=cursor(COMPANY_ID)),
+        "QuizCrud.check_main_role_by_user_id_and_company_id":
+            lambda: quizzes.check_main_role_by_user_id_and_company_id(user_id=USER_ID, company_id=COMPANY_ID),
+        "QuizCrud.get_quiz_by_id": lambda: quizzes.get_quiz_by_id(quiz_id=QUIZ_ID),
+        "QuizCrud.get_questions_by_quiz_id": lambda: quizzes.get_questions_by_quiz_id(quiz_id=QUIZ_ID),
+        "QuizCrud.get_answer_key": lambda: quizzes.get_answer_key(quiz=models.Quiz(id=QUIZ_ID, answer_key_version=0)),
+        "QuizCrud.get_answers_by_question_id": lambda: quizzes.get_answers_by_question_id(question_id=QUESTION_ID),
+        "QuizCrud.get_quizzes_by_cursor":
+            lambda: quizzes.get_quizzes_by_cursor(company_id=COMPANY_ID, params=cursor(QUIZ_ID)),
+        "ManagementCRUD.get_invites_by_user_id": lambda: management.get_invites_by_user_id(user_id=USER_ID),
+        "ManagementCRUD.get_request_by_user_id_and_company_id":
+            lambda: management.get_request_by_user_id_and_company_id(user_id=USER_ID, company_id=COMPANY_ID),
+        "ManagementCRUD.get_all_requests_to_companies":
+            lambda: management.get_all_requests_to_companies(owner_id=USER_ID),
+        "LeaderboardCrud.remove_user": lambda: leaderboards.remove_user(user_id=USER_ID),
+        "WorkflowCrud.get_general_result_by_user_and_company_id":
+            lambda: workflow.get_general_result_by_user_and_company_id(user_id=USER_ID, company_id=COMPANY_ID),
+        "WorkflowCrud.get_users_with_time_of_last_test":
+            lambda: workflow.get_users_with_time_of_last_test(company_id=COMPANY_ID, user_id=USER_ID),
+        "WorkflowCrud.get_all_gpa_by_time_and_company_id":
+            lambda: workflow.get_all_gpa_by_time_and_company_id(time=since, company_id=COMPANY_ID),
+        "WorkflowCrud.get_user_quizzes":
+            lambda: workflow.get_user_quizzes(user_id=USER_ID, company_id=COMPANY_ID, time=since),
+        "WorkflowCrud.get_my_gpa": lambda: workflow.get_my_gpa(user_id=USER_ID, time_in_hours=24),
+        "WorkflowCrud.get_my_quizzes_with_time_of_last_test":
+            lambda: workflow.get_my_quizzes_with_time_of_last_test(user_id=USER_ID),
+    }
+
+
+async def record_statements() -> List[Tuple[str, Executable]]:
+    db = RecordingSession()
+    recorded = list()
+    for name, lookup in lookups(db).items():
+        # Cached lookups have to miss to show their statement
+        for cache in caches:
+            cache.local.clear()
+        db.statements = list()
+        try:
+            await lookup()
+        except Exception:
+            # Only the statements matter, not what the method makes of the empty results
+            pass
+        if not db.statements:
+            raise RuntimeError(f"{name} executed no statement")
+        if len(db.statements) == 1:
+            recorded.append((name, db.statements[0]))
+        else:
+            recorded.extend((f"{name} [{number}]", statement) for number, statement in enumerate(db.statements, 1))
+    return recorded
+
+
+SEED_STATEMENTS = [
+    "INSERT INTO users (email, first_name, last_name, date_created) "
+    "SELECT 'seed-' || g || '@example.com', 'First', 'Last', now() - (g || ' minutes')::interval "
+    "FROM generate_series(1, :users) g",
+    "INSERT INTO companies (title, description, hidden) "
+    "SELECT 'Company ' || g, 'Seeded company', g % 10 = 0 FROM generate_series(1, :companies) g",
+    "INSERT INTO workers (user_id, company_id, role) "
+    "SELECT g, (g - 1) % :companies + 1, "
+    "CASE WHEN g <= :companies THEN 'owner'::role WHEN g % 7 = 0 THEN 'admin'::role ELSE 'staff'::role END "
+    "FROM generate_series(1, :users) g",
+    "INSERT INTO requests (user_id, company_id, request_from, status) "
+    "SELECT g, g % :companies + 1, "
+    "CASE WHEN g % 2 = 0 THEN 'user'::requestfrom ELSE 'company'::requestfrom END, 'pending'::requeststatus "
+    "FROM generate_series(1, :users) g",
+    "INSERT INTO quizzes (company_id, title, description, passing_frequency, number_of_questions) "
+    "SELECT (g - 1) % :companies + 1, 'Quiz ' || g, 'Seeded quiz', 1, 10 FROM generate_series(1, :companies * 5) g",
+    "INSERT INTO questions (quiz_id, question) "
+    "SELECT (g - 1) / 10 + 1, 'Question ' || g FROM generate_series(1, :companies * 50) g",
+    "INSERT INTO answers (question_id, answer, is_correct) "
+    "SELECT (g - 1) / 4 + 1, 'Answer ' || g, g % 4 = 1 FROM generate_series(1, :companies * 200) g",
+    "INSERT INTO general_results (user_id, company_id, gpa, update_date) "
+    "SELECT g, (g - 1) % :companies + 1, random(), now() - (g || ' minutes')::interval "
+    "FROM generate_series(1, :users) g",
+    "INSERT INTO quizzes_results (quiz_id, general_result_id, correct_answers, number_of_questions, gpa, "
+    "date_of_passage) "
+    "SELECT (g - 1) % (:companies * 5) + 1, (g - 1) % :users + 1, g % 11, 10, (g % 11) / 10.0, "
+    "now() - (g || ' minutes')::interval FROM generate_series(1, :users * 5) g",
+    "INSERT INTO gpa_rollups (company_id, user_id, quiz_id, granularity, bucket_start, attempts, correct_answers, "
+    "number_of_questions) "
+    "SELECT (g - 1) % :companies + 1, g, (g - 1) % (:companies * 5) + 1, 'hour'::rollup_granularity, "
+    "date_trunc('hour', timezone('UTC', now()) - (g || ' minutes')::interval), 1, g % 11, 10 "
+    "FROM generate_series(1, :users) g",
+]
+
+
+def iter_plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+async def seed(connection, users: int):
+    companies = max(users // 10, 1)
+    for statement in SEED_STATEMENTS:
+        await connection.execute(text(statement), {"users": users, "companies": companies})
+    await connection.execute(text("ANALYZE"))
+
+
+async def explain_all(disable_seqscan: bool) -> List[Tuple[str, List[str]]]:
+    failures = list()
+    statements = await record_statements()
+    engine = create_async_engine(Config.POSTGRES_URL)
+    async with engine.connect() as connection:
+        if disable_seqscan:
+            await connection.execute(text("SET enable_seqscan = off"))
+
+        for name, statement in statements:
+            result = await connection.execute(Explain(statement))
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            seq_scans = [
+                node["Relation Name"] for node in iter_plan_nodes(plan[0]["Plan"]) if node["Node Type"] == "Seq Scan"
+            ]
+            if seq_scans:
+                print(f"FAIL {name} (seq scan on {', '.join(seq_scans)})")
+                failures.append((name, seq_scans))
+            else:
+                print(f"ok   {name}")
+
+    await engine.dispose()
+    return failures
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.seed:
+        engine = create_async_engine(Config.POSTGRES_URL)
+        async with engine.begin() as connection:
+            await seed(connection, users=args.seed)
+        await engine.dispose()
+
+    failures = await explain_all(disable_seqscan=not args.allow_seqscan)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic users (and related rows) first")
+    parser.add_argument(
+        "--allow-seqscan", action="store_true", help="leave enable_seqscan on and judge the planner's real choice"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,40 @@
+"""Run the company export worker outside the API processes.
+
+    python -m scripts.export_worker
+
+Takes jobs off the same Redis queue the API enqueues to, so any number of these
+can run side by side. At least one has to, unless the API processes run their
+own with EXPORT_WORKER_ENABLED=true; otherwise jobs stay queued. EXPORT_DIR must
+be shared with the API processes, which serve the finished parts.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+import aioredis
+
+from src.config import Config
+from src.export_worker import ExportWorker
+
+
+async def main(args: argparse.Namespace):
+    redis = aioredis.from_url(Config.REDIS_URL)
+    worker = ExportWorker(poll_timeout=args.poll_timeout)
+    await worker.start(redis)
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+    await stopped.wait()
+
+    await worker.stop()
+    await redis.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--poll-timeout", type=int, default=5, help="seconds each BRPOP waits for a job")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parser.parse_args()))
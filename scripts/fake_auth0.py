@@ -0,0 +1,93 @@
+"""Local stand-in for the Auth0 endpoints the backend talks to.
+
+Run it next to the API and point AUTH0_BASE_URL at it:
+
+    uvicorn scripts.fake_auth0:app --port 8001
+    AUTH0_BASE_URL=http://127.0.0.1:8001 uvicorn src.main:app
+
+FAKE_AUTH0_LATENCY_MS and FAKE_AUTH0_ERROR_RATE simulate a slow or flaky
+upstream. POST /oauth/token mints RS256 access tokens signed with the key
+published at /.well-known/jwks.json, so the Auth0 verification path can be
+exercised end to end without the real tenant.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, EmailStr
+
+from src.config import Config
+
+LATENCY_MS = int(os.getenv("FAKE_AUTH0_LATENCY_MS", 0))
+ERROR_RATE = float(os.getenv("FAKE_AUTH0_ERROR_RATE", 0))
+KEY_ID = "fake-auth0-key"
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+public_jwk.update({"kid": KEY_ID, "use": "sig", "alg": "RS256"})
+
+users = dict()
+
+app = FastAPI()
+
+
+class SignUpRequest(BaseModel):
+    email: EmailStr
+    password: str
+    connection: str = None
+    client_id: str = None
+
+
+class TokenRequest(BaseModel):
+    email: EmailStr
+    expires_in: int = 3600
+
+
+async def simulate_upstream():
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        raise HTTPException(status_code=503, detail="Simulated upstream failure")
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    await simulate_upstream()
+    return {"keys": [public_jwk]}
+
+
+@app.post("/dbconnections/signup")
+async def sign_up(data: SignUpRequest):
+    await simulate_upstream()
+    if data.email in users:
+        return JSONResponse(status_code=400, content={"code": "invalid_signup", "description": "Invalid sign up"})
+
+    users[data.email] = uuid.uuid4().hex
+    return {"_id": users[data.email], "email": data.email, "email_verified": False}
+
+
+@app.post("/oauth/token")
+async def issue_token(data: TokenRequest):
+    await simulate_upstream()
+    now = int(time.time())
+    token = jwt.encode(
+        {
+            "iss": Config.AUTH0.issuer,
+            "aud": Config.AUTH0.api_audience,
+            "sub": f"auth0|{users.get(data.email, uuid.uuid4().hex)}",
+            "email": data.email,
+            "iat": now,
+            "exp": now + data.expires_in
+        },
+        private_key,
+        algorithm="RS256",
+        headers={"kid": KEY_ID}
+    )
+    return {"access_token": token, "token_type": "Bearer", "expires_in": data.expires_in}
@@ -0,0 +1,70 @@
+"""Move submitted answers from per-answer "{user_id}_{question_id}" keys into "answers:{user_id}" hashes.
+
+    python -m scripts.migrate_redis_answers --batch 1000
+
+Walks the keyspace with SCAN (never KEYS), so it can run against a live
+server. Each batch reads the old values and writes the hashes in pipelines,
+then deletes the old keys unless --keep-old is given. Safe to re-run and to
+run while traffic is on: fields are written with HSETNX, so an answer already
+submitted under the new layout is never overwritten by an older one.
+"""
+import argparse
+import asyncio
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+import aioredis
+
+from src.config import Config
+from src.crud.crud_workflow import answers_key
+
+OLD_KEY = re.compile(rb"^(\d+)_(\d+)$")
+
+
+async def migrate_batch(redis: aioredis.Redis, keys: List[bytes], keep_old: bool) -> int:
+    keys = [key for key in keys if OLD_KEY.match(key)]
+    if not keys:
+        return 0
+
+    values = await redis.mget(keys)
+    answers: Dict[str, Dict[bytes, bytes]] = defaultdict(dict)
+    moved = list()
+    for key, value in zip(keys, values):
+        if value is None:
+            continue
+        user_id, question_id = OLD_KEY.match(key).groups()
+        answers[answers_key(int(user_id))][question_id] = value
+        moved.append(key)
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, mapping in answers.items():
+            for question_id, answer_id in mapping.items():
+                pipe.hsetnx(key, question_id, answer_id)
+            if Config.QUIZ_ANSWERS_TTL_SECONDS:
+                pipe.expire(key, Config.QUIZ_ANSWERS_TTL_SECONDS)
+        if moved and not keep_old:
+            pipe.delete(*moved)
+        await pipe.execute()
+    return len(moved)
+
+
+async def main(args: argparse.Namespace):
+    redis = aioredis.from_url(Config.REDIS_URL)
+    moved = 0
+    batch = list()
+    async for key in redis.scan_iter(match="*_*", count=args.batch):
+        batch.append(key)
+        if len(batch) >= args.batch:
+            moved += await migrate_batch(redis, batch, keep_old=args.keep_old)
+            batch = list()
+    moved += await migrate_batch(redis, batch, keep_old=args.keep_old)
+    await redis.close()
+    print(f"moved {moved} answers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=1000, help="keys per SCAN page and per pipeline")
+    parser.add_argument("--keep-old", action="store_true", help="leave the old keys in place after copying")
+    asyncio.run(main(parser.parse_args()))
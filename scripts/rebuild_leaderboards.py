@@ -0,0 +1,90 @@
+"""Rebuild the company GPA leaderboards in Redis from general_results.
+
+    python -m scripts.rebuild_leaderboards
+    python -m scripts.rebuild_leaderboards --company-id 7
+
+Each board is filled under a scratch key and swapped in with RENAME, so readers
+see either the old board or the complete new one, never a partial one. A full
+rebuild also drops the boards of companies that no longer have any results. A
+submission committed while its company is being rebuilt can be missed; the
+user's next submission, or another rebuild, puts it back.
+"""
+import argparse
+import asyncio
+from typing import Dict, Optional, Set
+
+import aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import models
+from src.config import Config
+from src.crud.crud_leaderboard import leaderboard_key
+
+
+async def write_board(redis: aioredis.Redis, company_id: int, scores: Dict[int, float], batch: int):
+    key = leaderboard_key(company_id)
+    scratch = f"{key}:rebuild"
+    items = list(scores.items())
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.delete(scratch)
+        for start in range(0, len(items), batch):
+            pipe.zadd(scratch, dict(items[start:start + batch]))
+        pipe.rename(scratch, key)
+        await pipe.execute()
+
+
+async def drop_stale_boards(redis: aioredis.Redis, company_ids: Set[int]) -> int:
+    stale = list()
+    async for key in redis.scan_iter(match="leaderboard:*"):
+        company_id = key.decode().split(":")[1]
+        if company_id.isdigit() and int(company_id) not in company_ids:
+            stale.append(key)
+    if stale:
+        await redis.delete(*stale)
+    return len(stale)
+
+
+async def main(args: argparse.Namespace):
+    engine = create_async_engine(Config.POSTGRES_URL)
+    redis = aioredis.from_url(Config.REDIS_URL)
+
+    query = select(
+        models.GeneralResult.company_id, models.GeneralResult.user_id, models.GeneralResult.gpa
+    ).filter(models.GeneralResult.gpa.isnot(None)).order_by(models.GeneralResult.company_id)
+    if args.company_id is not None:
+        query = query.filter(models.GeneralResult.company_id == args.company_id)
+
+    company_ids = set()
+    current: Optional[int] = None
+    scores: Dict[int, float] = dict()
+    async with engine.connect() as connection:
+        result = await connection.stream(query.execution_options(yield_per=args.batch))
+        async for company_id, user_id, gpa in result:
+            if company_id != current:
+                if current is not None:
+                    await write_board(redis, current, scores, args.batch)
+                current = company_id
+                scores = dict()
+                company_ids.add(company_id)
+            scores[user_id] = gpa
+    if current is not None:
+        await write_board(redis, current, scores, args.batch)
+
+    if args.company_id is None:
+        dropped = await drop_stale_boards(redis, company_ids)
+    else:
+        dropped = 0
+        if args.company_id not in company_ids:
+            dropped = await redis.delete(leaderboard_key(args.company_id))
+
+    await redis.close()
+    await engine.dispose()
+    print(f"rebuilt {len(company_ids)} leaderboards, dropped {dropped}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company-id", type=int, default=None, help="rebuild only this company's board")
+    parser.add_argument("--batch", type=int, default=1000, help="rows per fetch and members per ZADD")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from src.config import Config, Auth0Settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses Auth0 answers without having acted on the request. A 502/504 from a gateway can
+# come after the signup already ran, so those are failures, not retries
+RETRYABLE_STATUS_CODES = {429, 503}
+
+
+class Auth0Error(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class Auth0UnavailableError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    # Closed until failure_threshold failures, then open for reset_timeout. After that it is
+    # half-open: exactly one call goes through as a probe and the rest keep failing fast
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def allow_request(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def release_probe(self):
+        # The probe ended without a verdict (e.g. cancelled); let the next caller probe instead
+        self.probing = False
+
+
+class Auth0Client:
+
+    def __init__(
+            self,
+            settings: Auth0Settings = Config.AUTH0,
+            base_url: str = Config.AUTH0_BASE_URL,
+            timeout: float = Config.AUTH0_TIMEOUT_SECONDS,
+            max_retries: int = Config.AUTH0_MAX_RETRIES,
+            max_connections: int = Config.AUTH0_MAX_CONNECTIONS
+    ):
+        self.settings = settings
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.AUTH0_BREAKER_FAILURES, reset_timeout=Config.AUTH0_BREAKER_RESET_SECONDS
+        )
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 3.0)),
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def sign_up(self, email: str, password: str) -> dict:
+        return await self._post("/dbconnections/signup", {
+            "client_id": self.settings.client_id,
+            "client_secret": self.settings.client_secret,
+            "audience": self.settings.api_audience,
+            "email": email,
+            "password": password,
+            "connection": self.settings.connection,
+            "grant_type": "client_credentials"
+        })
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        if not self.breaker.allow_request():
+            raise Auth0UnavailableError("Auth0 is temporarily unavailable")
+
+        probe = self.breaker.probing
+        try:
+            return await self._post_with_retries(path, payload)
+        finally:
+            if probe and self.breaker.probing:
+                self.breaker.release_probe()
+
+    async def _post_with_retries(self, path: str, payload: dict) -> dict:
+        # Signup is not idempotent, so only retry when Auth0 certainly did not process the request
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.client.post(path, json=payload)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as error:
+                failure = str(error) or error.__class__.__name__
+            except httpx.TransportError as error:
+                self.breaker.record_failure()
+                raise Auth0UnavailableError(f"Auth0 request failed: {str(error) or error.__class__.__name__}")
+            else:
+                if response.status_code < 400:
+                    self.breaker.record_success()
+                    return response.json()
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                        raise Auth0UnavailableError(f"Auth0 request failed: HTTP {response.status_code}")
+                    # The request itself is wrong (e.g. user exists), the upstream is healthy
+                    self.breaker.record_success()
+                    raise Auth0Error(response.status_code, self._error_message(response))
+                failure = f"HTTP {response.status_code}"
+
+            logger.warning("Auth0 %s attempt %s failed: %s", path, attempt + 1, failure)
+            if attempt < self.max_retries:
+                # Exponential backoff with full jitter
+                await asyncio.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+
+        self.breaker.record_failure()
+        raise Auth0UnavailableError(f"Auth0 request failed: {failure}")
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        try:
+            body = response.json()
+        except ValueError:
+            return response.text
+        if not isinstance(body, dict):
+            return response.text
+        return str(body.get("description") or body.get("message") or body.get("error") or response.text)
+
+
+auth0_client = Auth0Client()
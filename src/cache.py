@@ -0,0 +1,142 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+caches: List["TieredCache"] = list()
+
+
+def attach_redis(redis: Optional[aioredis.Redis]):
+    for cache in caches:
+        if cache.use_redis:
+            cache.redis = redis
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.namespace: cache.stats() for cache in caches}
+
+
+class TieredCache:
+    """In-process LRU in front of an optional shared Redis tier.
+
+    Caches created with use_redis=True get the shared Redis client attached at
+    startup; until then (or if Redis errors) they work as a plain local LRU.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            maxsize: int,
+            ttl: Optional[float] = None,
+            encode: Callable[[Any], str] = json.dumps,
+            decode: Callable[[str], Any] = json.loads,
+            use_redis: bool = False
+    ):
+        self.namespace = namespace
+        self.local = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.redis: Optional[aioredis.Redis] = None
+        self.use_redis = use_redis
+        self.encode = encode
+        self.decode = decode
+        self.redis_hits = 0
+        caches.append(self)
+
+    def _redis_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: Hashable) -> Any:
+        value = self.local.get(key)
+        if value is not None or self.redis is None:
+            return value
+
+        try:
+            raw = await self.redis.get(self._redis_key(key))
+        except aioredis.RedisError as error:
+            logger.warning("%s cache: redis get failed: %s", self.namespace, error)
+            return None
+        if raw is None:
+            return None
+
+        value = self.decode(raw)
+        self.local.set(key, value)
+        self.redis_hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.local.set(key, value, ttl=ttl)
+        if self.redis is None:
+            return
+
+        ttl = self.local.ttl if ttl is None else ttl
+        try:
+            await self.redis.set(
+                self._redis_key(key), self.encode(value), ex=max(1, int(ttl)) if ttl is not None else None
+            )
+        except aioredis.RedisError as error:
+            logger.warning("%s cache: redis set failed: %s", self.namespace, error)
+
+    async def delete(self, *keys: Hashable):
+        for key in keys:
+            self.local.delete(key)
+        if self.redis is None or not keys:
+            return
+
+        try:
+            await self.redis.delete(*[self._redis_key(key) for key in keys])
+        except aioredis.RedisError as error:
+            logger.warning("%s cache: redis delete failed: %s", self.namespace, error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.local.stats(), "redis_enabled": self.redis is not None, "redis_hits": self.redis_hits}
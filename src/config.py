@@ -1,5 +1,7 @@
 import os
 import secrets
+from dataclasses import dataclass, fields
+from typing import Tuple
 from dotenv import load_dotenv
 from configparser import ConfigParser
 
@@ -7,31 +9,100 @@ BASEDIR = os.path.abspath(os.path.dirname("../"))
 load_dotenv(dotenv_path=f"{BASEDIR}/.env")
 
 
+@dataclass(frozen=True)
+class Auth0Settings:
+    domain: str
+    api_audience: str
+    issuer: str
+    algorithms: Tuple[str, ...]
+    client_id: str
+    client_secret: str
+    connection: str
+
+    @classmethod
+    def load(cls) -> "Auth0Settings":
+        env = os.getenv("ENV", f"{BASEDIR}/.config")
+
+        if env == ".config":
+            parser = ConfigParser()
+            parser.read(".config")
+            config = parser["AUTH0"] if parser.has_section("AUTH0") else {}
+        else:
+            config = os.environ
+
+        return cls(
+            domain=config.get("DOMAIN") or "",
+            api_audience=config.get("API_AUDIENCE") or "",
+            issuer=config.get("ISSUER") or "",
+            algorithms=tuple(
+                algorithm.strip() for algorithm in (config.get("ALGORITHMS") or "").split(",") if algorithm.strip()
+            ),
+            client_id=config.get("CLIENT_ID") or "",
+            client_secret=config.get("CLIENT_SECRET") or "",
+            connection=config.get("CONNECTION") or ""
+        )
+
+    def validate(self):
+        missing = [field.name.upper() for field in fields(self) if not getattr(self, field.name)]
+        if missing:
+            raise RuntimeError(f"Auth0 settings are not configured: {', '.join(missing)}")
+
+
 class Config:
     POSTGRES_URL: str = os.getenv("POSTGRES_URL")
     REDIS_URL: str = os.getenv("REDIS_URL")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    # 0 keeps submitted answers in Redis without expiry
+    QUIZ_ANSWERS_TTL_SECONDS: int = int(os.getenv("QUIZ_ANSWERS_TTL_SECONDS", 60 * 60 * 24 * 30))
+
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
     ENCODE_ALGORITHM: str = os.getenv("JWT_ENCODE_ALGORITHM")
     SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
 
-    @staticmethod
-    def set_up_auth0() -> dict:
+    JWKS_CACHE_TTL_SECONDS: int = int(os.getenv("JWKS_CACHE_TTL_SECONDS", 600))
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+    TOKEN_CACHE_MAX_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", 300))
+    TOKEN_CACHE_USE_REDIS: bool = os.getenv("TOKEN_CACHE_USE_REDIS", "false").lower() == "true"
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", 300))
+    USER_CACHE_USE_REDIS: bool = os.getenv("USER_CACHE_USE_REDIS", "false").lower() == "true"
+    ANSWER_KEY_CACHE_MAX_SIZE: int = int(os.getenv("ANSWER_KEY_CACHE_MAX_SIZE", 1000))
+    ANSWER_KEY_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_KEY_CACHE_TTL_SECONDS", 3600))
+    ANSWER_KEY_CACHE_USE_REDIS: bool = os.getenv("ANSWER_KEY_CACHE_USE_REDIS", "false").lower() == "true"
+    ROLE_CACHE_TTL_SECONDS: int = int(os.getenv("ROLE_CACHE_TTL_SECONDS", 60))
+    COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("COUNT_CACHE_TTL_SECONDS", 60))
 
-        env = os.getenv("ENV", f"{BASEDIR}/.config")
+    # Hourly GPA rollups past the retention are compacted into daily ones every interval (0 turns the task off)
+    GPA_ROLLUP_HOURLY_RETENTION_HOURS: int = int(os.getenv("GPA_ROLLUP_HOURLY_RETENTION_HOURS", 48))
+    GPA_ROLLUP_COMPACT_INTERVAL_SECONDS: int = int(os.getenv("GPA_ROLLUP_COMPACT_INTERVAL_SECONDS", 3600))
 
-        if env == ".config":
-            config = ConfigParser()
-            config.read(".config")
-            config = config["AUTH0"]
-        else:
-            config = {
-                "DOMAIN": os.getenv("DOMAIN"),
-                "API_AUDIENCE": os.getenv("API_AUDIENCE"),
-                "ISSUER": os.getenv("ISSUER"),
-                "ALGORITHMS": os.getenv("ALGORITHMS"),
-                "CLIENT_ID": os.getenv("CLIENT_ID"),
-                "CLIENT_SECRET": os.getenv("CLIENT_SECRET"),
-                "CONNECTION": os.getenv("CONNECTION")
-            }
-        return config
+    # Company-wide result exports run in a background worker on their own small pool
+    EXPORT_DIR: str = os.getenv("EXPORT_DIR") or f"{BASEDIR}/exports"
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", 5000))
+    EXPORT_JOB_TTL_SECONDS: int = int(os.getenv("EXPORT_JOB_TTL_SECONDS", 60 * 60 * 24))
+    # A job in the processing list untouched for this long lost its worker; longer than any one chunk takes
+    EXPORT_JOB_STALE_SECONDS: int = int(os.getenv("EXPORT_JOB_STALE_SECONDS", 900))
+    EXPORT_WORKER_ENABLED: bool = os.getenv("EXPORT_WORKER_ENABLED", "false").lower() == "true"
+    EXPORT_DB_POOL_SIZE: int = int(os.getenv("EXPORT_DB_POOL_SIZE", 1))
+    EXPORT_DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("EXPORT_DB_STATEMENT_TIMEOUT_MS", 120000))
+
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
+    # Read once at import, validated on startup so a broken config fails the boot, not a request
+    AUTH0: Auth0Settings = Auth0Settings.load()
+    # Points at the local fake Auth0 (scripts/fake_auth0.py) in tests and benchmarks
+    AUTH0_BASE_URL: str = os.getenv("AUTH0_BASE_URL") or f"https://{AUTH0.domain}"
+    AUTH0_TIMEOUT_SECONDS: float = float(os.getenv("AUTH0_TIMEOUT_SECONDS", 5))
+    AUTH0_MAX_RETRIES: int = int(os.getenv("AUTH0_MAX_RETRIES", 2))
+    AUTH0_MAX_CONNECTIONS: int = int(os.getenv("AUTH0_MAX_CONNECTIONS", 20))
+    AUTH0_BREAKER_FAILURES: int = int(os.getenv("AUTH0_BREAKER_FAILURES", 5))
+    AUTH0_BREAKER_RESET_SECONDS: float = float(os.getenv("AUTH0_BREAKER_RESET_SECONDS", 30))
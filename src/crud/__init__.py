@@ -2,4 +2,6 @@ from .crud_user import UserCRUD
 from .crud_company import CompanyCRUD
 from .crud_management import ManagementCRUD
 from .crud_quiz import QuizCrud
+from .crud_leaderboard import LeaderboardCrud
 from .crud_workflow import WorkflowCrud
+from .crud_export import ExportCrud
@@ -0,0 +1,10 @@
+from src import models
+from src.models.worker import Role
+
+# Shared filter fragments for the lambda statements in the CRUD classes. Enum values referenced
+# directly inside a lambda_stmt are tracked as untyped bound values and lose the Enum conversion,
+# so role checks are built here once as ordinary SQL expressions and referenced as a whole.
+
+IS_OWNER = models.Worker.role == Role.owner
+
+IS_OWNER_OR_ADMIN = (models.Worker.role == Role.owner) | (models.Worker.role == Role.admin)
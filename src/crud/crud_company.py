@@ -1,19 +1,48 @@
+import logging
 from typing import List
-from sqlalchemy import select
+
+import aioredis
+from sqlalchemy import delete, lambda_stmt, select
 from fastapi import HTTPException, Depends
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.async_sqlalchemy import paginate
 
-from src.database import AsyncSession, get_db_session
+from src.config import Config
+from src.database import AsyncSession, get_db_session, after_commit
+from src.crud.criteria import IS_OWNER, IS_OWNER_OR_ADMIN
 from src.models.worker import Role
+from src.pagination import CursorPage, CursorParams, paginate_by_keyset
+from src.resources import get_redis
 from src import schemas, models
 
+logger = logging.getLogger(__name__)
+
+
+def role_version_key(company_id: int) -> str:
+    # Bumped after every commit that adds, changes or removes a worker of the company. Never
+    # expires, so a version can never come back while entries cached under it are still alive
+    return f"company_role_version:{company_id}"
+
+
+def role_key(company_id: int, version: int, user_id: int) -> str:
+    # Whether the user is the company's owner or an admin, as of that version
+    return f"company_role:{company_id}:{version}:{user_id}"
+
 
 class CompanyCRUD:
 
-    def __init__(self, db: AsyncSession = Depends(get_db_session)):
+    def __init__(
+            self,
+            db: AsyncSession = Depends(get_db_session),
+            redis: aioredis.Redis = Depends(get_redis)
+    ):
         self.db: AsyncSession = db
+        self.redis: aioredis.Redis = redis
 
     async def get_company_by_id(self, company_id: int) -> models.Company:
-        result = await self.db.execute(select(models.Company).filter(models.Company.id == company_id))
+        result = await self.db.execute(lambda_stmt(
+            lambda: select(models.Company).filter(models.Company.id == company_id)
+        ))
         result = result.scalars().first()
         if result is None:
             raise HTTPException(status_code=404, detail="Not Found Company")
@@ -25,20 +54,28 @@ class CompanyCRUD:
         ))
         return result.scalars().all()
 
-    async def get_all_public_companies(self, skip: int = 0, limit: int = 100) -> List[models.Company]:
-        result = await self.db.execute(select(models.Company).filter(
+    async def get_all_public_companies(self, params: Params) -> Page:
+        return await paginate(self.db, select(models.Company).filter(
             models.Company.hidden == False
-        ).offset(skip).limit(limit))
-        return result.scalars().all()
+        ).order_by(models.Company.id), params)
+
+    async def get_public_companies_by_cursor(self, params: CursorParams) -> CursorPage:
+        return await paginate_by_keyset(
+            self.db,
+            select(models.Company).filter(models.Company.hidden == False),
+            keys=(models.Company.id,),
+            params=params,
+            count_key="public_companies"
+        )
 
     async def get_workers_by_company_id(self, company_id: int) -> List[models.Worker]:
         result = await self.db.execute(select(models.Worker).filter(models.Worker.company_id == company_id))
         return result.scalars().all()
 
     async def get_owner_by_company_id(self, company_id: int) -> models.User:
-        result = await self.db.execute(select(models.User).join(models.Worker).filter(
-            (models.Worker.company_id == company_id) & (models.Worker.role == Role.owner)
-        ))
+        result = await self.db.execute(lambda_stmt(lambda: select(models.User).join(models.Worker).filter(
+            (models.Worker.company_id == company_id) & IS_OWNER
+        )))
         return result.scalars().first()
 
     async def get_company_where_im_owner(self, user_id) -> List[models.Worker]:
@@ -48,23 +85,72 @@ class CompanyCRUD:
         return result.scalars().all()
 
     async def get_company_where_im_owner_or_admin_by_company_id(self, company_id: int, user_id: int) -> models.Company:
-        result = await self.db.execute(select(models.Company).join(models.Worker).filter(
+        result = await self.db.execute(lambda_stmt(lambda: select(models.Company).join(models.Worker).filter(
             (models.Company.id == company_id) &
             (models.Worker.user_id == user_id) &
-            ((models.Worker.role == Role.owner) | (models.Worker.role == Role.admin))
-        ))
+            IS_OWNER_OR_ADMIN
+        )))
         result = result.scalars().first()
         if not result:
             raise HTTPException(status_code=404, detail="You are not owner or admin in this company")
         return result
 
+    async def check_owner_or_admin(self, company_id: int, user_id: int):
+        """Same check as get_company_where_im_owner_or_admin_by_company_id, cached in Redis for
+        read paths that must not reach Postgres on every poll.
+
+        The entry is keyed by the company's role version, read first. A reader that raced a
+        role change can only have cached its answer under the old version, which nobody
+        reads once the change has committed and bumped it.
+        """
+        version = None
+        is_owner_or_admin = None
+        try:
+            version = int(await self.redis.get(role_version_key(company_id)) or 0)
+            cached = await self.redis.get(role_key(company_id, version, user_id))
+            if cached is not None:
+                is_owner_or_admin = cached == b"1"
+        except aioredis.RedisError as error:
+            logger.warning("role cache: redis get failed: %s", error)
+
+        if is_owner_or_admin is None:
+            result = await self.db.execute(lambda_stmt(lambda: select(models.Worker.id).filter(
+                (models.Worker.company_id == company_id) & (models.Worker.user_id == user_id) & IS_OWNER_OR_ADMIN
+            )))
+            is_owner_or_admin = result.first() is not None
+            if version is not None:
+                try:
+                    await self.redis.set(
+                        role_key(company_id, version, user_id), int(is_owner_or_admin), ex=Config.ROLE_CACHE_TTL_SECONDS
+                    )
+                except aioredis.RedisError as error:
+                    logger.warning("role cache: redis set failed: %s", error)
+
+        if not is_owner_or_admin:
+            raise HTTPException(status_code=404, detail="You are not owner or admin in this company")
+
+    def invalidate_roles(self, *company_ids: int):
+        async def invalidate():
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for company_id in company_ids:
+                    pipe.incr(role_version_key(company_id))
+                await pipe.execute()
+
+        if company_ids:
+            after_commit(self.db, invalidate)
+
+    async def invalidate_roles_of_user(self, user_id: int):
+        # Must run before the user's worker rows are deleted, to know which companies they were in
+        result = await self.db.execute(select(models.Worker.company_id).filter(models.Worker.user_id == user_id))
+        self.invalidate_roles(*result.scalars().all())
+
     async def get_worker_by_user_id_and_company_id(self, user_id: int, company_id: int) -> models.Worker:
-        result = await self.db.execute(select(models.Worker).filter(
+        result = await self.db.execute(lambda_stmt(lambda: select(models.Worker).filter(
             (models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)
-        ))
+        )))
         return result.scalars().first()
 
-    async def create_company(self, company_data: schemas.CreateCompany, user: schemas.User) -> models.Company:
+    async def create_company(self, company_data: schemas.CreateCompany, user_id: int) -> models.Company:
 
         company = models.Company(
             title=company_data.title,
@@ -72,26 +158,25 @@ class CompanyCRUD:
         )
 
         self.db.add(company)
-        await self.db.commit()
-        await self.db.refresh(company)
+        await self.db.flush()
 
         await self.create_worker_in_company(
             company=company,
-            user=user,
+            user_id=user_id,
             role=Role.owner
         )
         return company
 
-    async def create_worker_in_company(self, company: models.Company, user: models.User, role: Role) -> models.Worker:
+    async def create_worker_in_company(self, company: models.Company, user_id: int, role: Role) -> models.Worker:
         worker = models.Worker(
             company=company,
-            user=user,
+            user_id=user_id,
             role=role
         )
 
         self.db.add(worker)
-        await self.db.commit()
-        await self.db.refresh(worker)
+        await self.db.flush()
+        self.invalidate_roles(company.id)
         return worker
 
     async def update_worker_admin(self, user_id: int, company_id: int, owner_id: int, role: Role) -> models.Worker:
@@ -107,8 +192,8 @@ class CompanyCRUD:
 
         worker.role = role
 
-        await self.db.commit()
-        await self.db.refresh(worker)
+        await self.db.flush()
+        self.invalidate_roles(company_id)
         return worker
 
     async def update_company_status(
@@ -124,8 +209,7 @@ class CompanyCRUD:
 
         company.hidden = change_data.hidden
 
-        await self.db.commit()
-        await self.db.refresh(company)
+        await self.db.flush()
         return company
 
     async def update_company_info(
@@ -147,8 +231,7 @@ class CompanyCRUD:
         if update_data.description:
             company.description = update_data.description
 
-        await self.db.commit()
-        await self.db.refresh(company)
+        await self.db.flush()
         return company
 
     async def delete_company(self, company_id: int, user_id: int):
@@ -160,16 +243,11 @@ class CompanyCRUD:
         if owner.id is not user_id:
             raise HTTPException(status_code=403, detail="You are not the owner of this company")
 
-        await self.delete_all_workers_in_company(company_id=company.id)
-        await self.db.delete(company)
-        await self.db.commit()
-
-    async def delete_all_workers_in_company(self, company_id: int):
-        result = await self.db.execute(select(models.Worker).filter(models.Worker.company_id == company_id))
-        workers = result.scalars().all()
-        for worker in workers:
-            await self.db.delete(worker)
-            await self.db.commit()
+        # Workers, requests, quizzes and results go with it through ON DELETE CASCADE
+        await self.db.execute(
+            delete(models.Company).filter(models.Company.id == company.id).execution_options(synchronize_session=False)
+        )
+        self.invalidate_roles(company.id)
 
     async def delete_worker(self, company_id: int, user_id: int, owner_id: int):
         if user_id == owner_id:
@@ -186,4 +264,5 @@ class CompanyCRUD:
             raise HTTPException(status_code=404, detail="Not Found Worker")
 
         await self.db.delete(worker)
-        await self.db.commit()
+        await self.db.flush()
+        self.invalidate_roles(company_id)
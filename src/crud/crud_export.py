@@ -0,0 +1,65 @@
+import os
+import uuid
+
+import aioredis
+from fastapi import Depends, HTTPException
+
+from src.config import Config
+from src.crud import CompanyCRUD
+from src.export_worker import EXPORT_QUEUE_KEY, decode_export_job, export_job_dir, export_job_key, utc_now
+from src.resources import get_redis
+from src import schemas
+
+
+class ExportCrud:
+
+    def __init__(
+            self,
+            redis: aioredis.Redis = Depends(get_redis),
+            company_crud: CompanyCRUD = Depends()
+    ):
+        self.redis: aioredis.Redis = redis
+        self.company_crud = company_crud
+
+    async def create_company_export_job(self, company_id: int, user_id: int) -> schemas.ExportJob:
+        await self.company_crud.get_company_where_im_owner_or_admin_by_company_id(
+            company_id=company_id, user_id=user_id
+        )
+
+        job_id = uuid.uuid4().hex
+        now = utc_now()
+        job = {
+            "company_id": company_id,
+            "user_id": user_id,
+            "status": schemas.ExportJobStatus.queued.value,
+            "rows": 0,
+            "parts": "[]",
+            "created_at": now,
+            "updated_at": now
+        }
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(export_job_key(job_id), mapping=job)
+            pipe.expire(export_job_key(job_id), Config.EXPORT_JOB_TTL_SECONDS)
+            pipe.lpush(EXPORT_QUEUE_KEY, job_id)
+            await pipe.execute()
+
+        return schemas.ExportJob(id=job_id, **{**job, "parts": list()})
+
+    async def get_export_job(self, job_id: str, user_id: int) -> schemas.ExportJob:
+        raw = await self.redis.hgetall(export_job_key(job_id))
+        if not raw:
+            raise HTTPException(status_code=404, detail="Not Found Export Job")
+        job = decode_export_job(job_id, raw)
+
+        await self.company_crud.get_company_where_im_owner_or_admin_by_company_id(
+            company_id=job.company_id, user_id=user_id
+        )
+        return job
+
+    async def get_export_part_path(self, job_id: str, part: str, user_id: int) -> str:
+        job = await self.get_export_job(job_id=job_id, user_id=user_id)
+        # Only names the worker recorded, so the path can never leave the job's directory
+        if part not in job.parts:
+            raise HTTPException(status_code=404, detail="Not Found Export Part")
+        return os.path.join(export_job_dir(job.id), part)
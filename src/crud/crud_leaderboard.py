@@ -0,0 +1,95 @@
+from typing import List, Tuple
+
+import aioredis
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+
+from src.crud import CompanyCRUD
+from src.database import AsyncSession, get_db_session, after_commit
+from src.resources import get_redis
+from src import schemas, models
+
+
+def leaderboard_key(company_id: int) -> str:
+    # Sorted set of user_id scored by the user's overall GPA in the company
+    return f"leaderboard:{company_id}"
+
+
+def to_entries(rows: List[Tuple[bytes, float]], offset: int) -> List[schemas.LeaderboardEntry]:
+    return [
+        schemas.LeaderboardEntry(rank=offset + position + 1, user_id=int(user_id), gpa=gpa)
+        for position, (user_id, gpa) in enumerate(rows)
+    ]
+
+
+class LeaderboardCrud:
+    """Company GPA rankings kept in Redis sorted sets.
+
+    Writes happen after the submission's commit; reads are O(log n) sorted set
+    lookups and, with the role cached, never reach Postgres.
+    scripts/rebuild_leaderboards.py reconstructs the sets from general_results.
+    """
+
+    def __init__(
+            self,
+            db: AsyncSession = Depends(get_db_session),
+            redis: aioredis.Redis = Depends(get_redis),
+            company_crud: CompanyCRUD = Depends()
+    ):
+        self.db: AsyncSession = db
+        self.redis: aioredis.Redis = redis
+        self.company_crud = company_crud
+
+    def set_score(self, company_id: int, user_id: int, gpa: float):
+        async def store():
+            await self.redis.zadd(leaderboard_key(company_id), {user_id: gpa})
+
+        after_commit(self.db, store)
+
+    def drop_company(self, company_id: int):
+        async def drop():
+            await self.redis.delete(leaderboard_key(company_id))
+
+        after_commit(self.db, drop)
+
+    async def remove_user(self, user_id: int):
+        # Must run before the user's general results are deleted, to know which boards hold them
+        result = await self.db.execute(select(models.GeneralResult.company_id).filter(
+            models.GeneralResult.user_id == user_id
+        ))
+        company_ids = result.scalars().all()
+
+        async def remove():
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for company_id in company_ids:
+                    pipe.zrem(leaderboard_key(company_id), user_id)
+                await pipe.execute()
+
+        if company_ids:
+            after_commit(self.db, remove)
+
+    async def get_top(self, company_id: int, limit: int, user_id: int) -> List[schemas.LeaderboardEntry]:
+        await self.company_crud.check_owner_or_admin(company_id=company_id, user_id=user_id)
+
+        rows = await self.redis.zrevrange(leaderboard_key(company_id), 0, limit - 1, withscores=True)
+        return to_entries(rows, offset=0)
+
+    async def get_range(self, company_id: int, offset: int, limit: int, user_id: int) -> schemas.LeaderboardPage:
+        await self.company_crud.check_owner_or_admin(company_id=company_id, user_id=user_id)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrevrange(leaderboard_key(company_id), offset, offset + limit - 1, withscores=True)
+            pipe.zcard(leaderboard_key(company_id))
+            rows, total = await pipe.execute()
+        return schemas.LeaderboardPage(items=to_entries(rows, offset=offset), total=total)
+
+    async def get_rank(self, company_id: int, worker_id: int, user_id: int) -> schemas.LeaderboardEntry:
+        await self.company_crud.check_owner_or_admin(company_id=company_id, user_id=user_id)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(leaderboard_key(company_id), worker_id)
+            pipe.zscore(leaderboard_key(company_id), worker_id)
+            rank, gpa = await pipe.execute()
+        if rank is None:
+            raise HTTPException(status_code=404, detail="The user has no results in this company")
+        return schemas.LeaderboardEntry(rank=rank + 1, user_id=worker_id, gpa=gpa)
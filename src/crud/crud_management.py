@@ -3,6 +3,7 @@ from sqlalchemy import select
 from fastapi import HTTPException, Depends
 
 from src.models.request import RequestFrom, RequestStatus
+from src.models.worker import Role
 from src.database import AsyncSession, get_db_session
 from src.crud import CompanyCRUD, UserCRUD
 from src import schemas, models
@@ -28,23 +29,21 @@ class ManagementCRUD:
         return result
 
     async def get_invites_by_user_id(self, user_id) -> List[schemas.Invite]:
-        result = list()
-        invites = await self.db.execute(select(models.Request).filter(
+        invites = await self.db.execute(select(
+            models.Request.id, models.Request.status, models.Company.id.label("company_id"), models.Company.title
+        ).join(models.Company).filter(
             (models.Request.user_id == user_id) &
             (models.Request.request_from == RequestFrom.company) &
             (models.Request.status == RequestStatus.pending)
         ))
-        invites = invites.scalars().all()
-        for invite in invites:
-            result.append(schemas.Invite(
+        return [
+            schemas.Invite.construct(
                 id=invite.id,
                 status=invite.status,
-                company=schemas.InviteFrom(
-                    id=invite.company.id,
-                    title=invite.company.title
-                )
-            ))
-        return result
+                company=schemas.InviteFrom.construct(id=invite.company_id, title=invite.title)
+            )
+            for invite in invites
+        ]
 
     async def get_invite_by_user_id_and_company_id(self, user_id: int, company_id: int) -> models.Request:
         result = await self.db.execute(select(models.Request).filter(
@@ -79,8 +78,7 @@ class ManagementCRUD:
         )
 
         self.db.add(invite)
-        await self.db.commit()
-        await self.db.refresh(invite)
+        await self.db.flush()
         return invite
 
     async def update_invite(
@@ -93,8 +91,7 @@ class ManagementCRUD:
 
         invite_exist.status = status
 
-        await self.db.commit()
-        await self.db.refresh(invite_exist)
+        await self.db.flush()
         return invite_exist
 
     async def get_request_by_id(self, request_id: int) -> models.Request:
@@ -104,40 +101,28 @@ class ManagementCRUD:
             raise HTTPException(status_code=404, detail="Not Found Request")
         return result
 
-    async def get_requests_by_company_id_and_status(
-            self, company_id: int, status: RequestStatus
-    ) -> List[models.Request]:
-        result = await self.db.execute(select(models.Request).filter(
-            (models.Request.company_id == company_id) &
-            (models.Request.status == status) &
-            (models.Request.request_from == RequestFrom.user)
-        ))
-        return result.scalars().all()
-
     async def get_all_requests_to_companies(
             self, owner_id: int
     ) -> List[schemas.Request]:
-        result = list()
-        where_im_owner = await self.company_crud.get_company_where_im_owner(user_id=owner_id)
-        for company in where_im_owner:
-            requests = await self.get_requests_by_company_id_and_status(
-                company_id=company.id, status=RequestStatus.pending
+        # Pending requests to every company the user owns in one join, not a query per company
+        requests = await self.db.execute(select(
+            models.Request.id, models.Request.user_id, models.User.email, models.Request.company_id, models.Company.title
+        ).join(models.User, models.Request.user_id == models.User.id).join(
+            models.Company, models.Request.company_id == models.Company.id
+        ).join(models.Worker, models.Worker.company_id == models.Request.company_id).filter(
+            (models.Worker.user_id == owner_id) &
+            (models.Worker.role == Role.owner) &
+            (models.Request.status == RequestStatus.pending) &
+            (models.Request.request_from == RequestFrom.user)
+        ))
+        return [
+            schemas.Request.construct(
+                id=request.id,
+                from_user=schemas.RequestFrom.construct(id=request.user_id, email=request.email),
+                to_company=schemas.RequestTo.construct(id=request.company_id, title=request.title)
             )
-            for request in requests:
-                result.append(schemas.Request(
-                        id=request.id,
-                        status=request.status,
-                        from_user=schemas.RequestFrom(
-                            id=request.user_id,
-                            email=request.user.email
-                        ),
-                        to_company=schemas.RequestTo(
-                            id=request.company_id,
-                            title=company.title
-                        )
-                    )
-                )
-        return result
+            for request in requests
+        ]
 
     async def get_request_by_user_id_and_company_id(self, user_id: int, company_id: int) -> models.Request:
         result = await self.db.execute(select(models.Request).filter(
@@ -172,8 +157,7 @@ class ManagementCRUD:
         )
 
         self.db.add(request)
-        await self.db.commit()
-        await self.db.refresh(request)
+        await self.db.flush()
         return request
 
     async def update_request(
@@ -187,6 +171,5 @@ class ManagementCRUD:
 
         request_exist.status = status
 
-        await self.db.commit()
-        await self.db.refresh(request_exist)
+        await self.db.flush()
         return request_exist
@@ -1,13 +1,35 @@
-from typing import List
-from sqlalchemy import select
+import json
+from typing import Dict, List, Tuple
+from sqlalchemy import Sequence, delete, func, insert, lambda_stmt, select
 from fastapi import HTTPException, Depends
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.async_sqlalchemy import paginate
 
+from src.cache import TieredCache
+from src.config import Config
 from src.crud import CompanyCRUD
+from src.crud.criteria import IS_OWNER_OR_ADMIN
 from src.database import AsyncSession, get_db_session
-from src.models.worker import Role
+from src.pagination import CursorPage, CursorParams, paginate_by_keyset
 from src import schemas, models
 
 
+def decode_answer_key(raw: str) -> Dict[int, int]:
+    # JSON object keys are strings
+    return {int(question_id): answer_id for question_id, answer_id in json.loads(raw).items()}
+
+
+# "{quiz_id}:{answer_key_version}" -> {question_id: correct answer_id}. Every change to a quiz's
+# questions bumps the version, so no process, whichever tier it reads, can score against an old key
+answer_key_cache = TieredCache(
+    namespace="answer_key",
+    maxsize=Config.ANSWER_KEY_CACHE_MAX_SIZE,
+    ttl=Config.ANSWER_KEY_CACHE_TTL_SECONDS,
+    decode=decode_answer_key,
+    use_redis=Config.ANSWER_KEY_CACHE_USE_REDIS
+)
+
+
 class QuizCrud:
 
     def __init__(
@@ -18,26 +40,33 @@ class QuizCrud:
         self.db: AsyncSession = db
         self.company_crud = company_crud
 
-    async def get_all_quizzes(self, company_id: int, skip: int = 0, limit: int = 100) -> List[models.Quiz]:
-        result = await self.db.execute(select(models.Quiz).filter(
+    async def get_all_quizzes(self, company_id: int, params: Params) -> Page:
+        return await paginate(self.db, select(models.Quiz).filter(
             models.Quiz.company_id == company_id
-        ).offset(skip).limit(limit))
-        return result.scalars().all()
+        ).order_by(models.Quiz.id), params)
+
+    async def get_quizzes_by_cursor(self, company_id: int, params: CursorParams) -> CursorPage:
+        return await paginate_by_keyset(
+            self.db,
+            select(models.Quiz).filter(models.Quiz.company_id == company_id),
+            keys=(models.Quiz.id,),
+            params=params,
+            count_key=f"quizzes:{company_id}"
+        )
 
     async def check_main_role_by_user_id_and_company_id(
             self, user_id: int, company_id: int
     ):
-        result = await self.db.execute(select(models.User).join(models.Worker).filter(
-            ((models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)) &
-            ((models.Worker.role == Role.owner) | (models.Worker.role == Role.admin))
-        ))
+        result = await self.db.execute(lambda_stmt(lambda: select(models.User).join(models.Worker).filter(
+            ((models.Worker.user_id == user_id) & (models.Worker.company_id == company_id)) & IS_OWNER_OR_ADMIN
+        )))
         result = result.scalars().first()
         if not result:
             raise HTTPException(status_code=400, detail="The user is not the owner or administrator of this company")
         return result
 
     async def get_quiz_by_id(self, quiz_id: int) -> models.Quiz:
-        result = await self.db.execute(select(models.Quiz).filter(models.Quiz.id == quiz_id))
+        result = await self.db.execute(lambda_stmt(lambda: select(models.Quiz).filter(models.Quiz.id == quiz_id)))
         result = result.scalars().first()
         if not result:
             raise HTTPException(status_code=404, detail="Not Found Quiz")
@@ -62,11 +91,25 @@ class QuizCrud:
         ))
         return result.scalars().all()
 
-    async def get_correct_answers_by_quiz_id(self, quiz_id: int) -> List[models.Answer]:
-        result = await self.db.execute(select(models.Answer).join(models.Question).join(models.Quiz).filter(
-            (models.Quiz.id == quiz_id) & (models.Answer.is_correct == True)
-        ))
-        return result.scalars().all()
+    async def get_answer_key(self, quiz: models.Quiz) -> Dict[int, int]:
+        cache_key = f"{quiz.id}:{quiz.answer_key_version}"
+        answer_key = await answer_key_cache.get(cache_key)
+        if answer_key is not None:
+            return answer_key
+
+        quiz_id = quiz.id
+        result = await self.db.execute(lambda_stmt(lambda: select(
+            models.Answer.question_id, models.Answer.id
+        ).join(models.Question).filter(
+            (models.Question.quiz_id == quiz_id) & (models.Answer.is_correct == True)
+        )))
+        answer_key = {question_id: answer_id for question_id, answer_id in result}
+        await answer_key_cache.set(cache_key, answer_key)
+        return answer_key
+
+    def bump_answer_key_version(self, quiz: models.Quiz):
+        # Incremented in SQL so concurrent edits of the same quiz cannot both land on one version
+        quiz.answer_key_version = models.Quiz.answer_key_version + 1
 
     async def get_answers_by_question_id(self, question_id: int) -> List[models.Answer]:
         result = await self.db.execute(select(models.Answer).filter(models.Answer.question_id == question_id))
@@ -88,12 +131,10 @@ class QuizCrud:
         )
 
         self.db.add(quiz)
-        await self.db.commit()
-        await self.db.refresh(quiz)
+        await self.db.flush()
 
         questions = await self.create_questions_to_quiz(questions_data=quiz_data.list_questions, quiz=quiz)
 
-        await self.db.refresh(quiz)
         return schemas.QuizResponse(
             id=quiz.id,
             title=quiz.title,
@@ -103,68 +144,66 @@ class QuizCrud:
             list_questions=questions
         )
 
+    async def allocate_ids(self, question_count: int, answer_count: int) -> Tuple[List[int], List[int]]:
+        # Ids are drawn from the sequences up front and inserted explicitly, so pairing answers with
+        # their question never depends on the order RETURNING happens to yield rows in
+        def draw(sequence: str, count: int):
+            return func.array(
+                select(Sequence(sequence).next_value()).select_from(func.generate_series(1, count)).scalar_subquery()
+            )
+
+        result = await self.db.execute(select(
+            draw("questions_id_seq", question_count), draw("answers_id_seq", answer_count)
+        ))
+        question_ids, answer_ids = result.one()
+        return question_ids, answer_ids
+
     async def create_questions_to_quiz(
             self, questions_data: List[schemas.Question], quiz: models.Quiz
     ) -> List[schemas.QuestionsResponse]:
-        questions_list = list()
-        for question_data in questions_data:
-            question = models.Question(
-                question=question_data.question,
-                quiz=quiz
-            )
+        if not questions_data:
+            return list()
 
-            self.db.add(question)
-            await self.db.commit()
-            await self.db.refresh(question)
-            question_id = question.id
-            question_title = question.question
+        question_ids, answer_ids = await self.allocate_ids(
+            question_count=len(questions_data),
+            answer_count=sum(len(question_data.answer_options) for question_data in questions_data)
+        )
 
-            answers = await self.create_answers_to_question(
-                answers_data=question_data.answer_options,
-                correct_answer=question_data.correct_answer,
-                question=question
-            )
+        await self.db.execute(insert(models.Question).values([
+            {"id": question_id, "quiz_id": quiz.id, "question": question_data.question}
+            for question_id, question_data in zip(question_ids, questions_data)
+        ]))
+        answers = await self.create_answers_to_questions(
+            questions_data=questions_data, question_ids=question_ids, answer_ids=answer_ids
+        )
 
-            questions_list.append(
-                schemas.QuestionsResponse(
-                    id=question_id, question=question_title, answer_options=answers
-                )
+        return [
+            schemas.QuestionsResponse(
+                id=question_id, question=question_data.question, answer_options=answers[question_id]
             )
-        return questions_list
-
-    async def create_answers_to_question(
-            self, answers_data: list, correct_answer: int, question: models.Question
-    ) -> List[schemas.AnswerResponse]:
-        answers_list = list()
-        counter = 0
-
-        for answer_data in answers_data:
-            if correct_answer == counter:
-                answer = models.Answer(
-                    answer=answer_data,
-                    is_correct=True,
-                    question=question
+            for question_id, question_data in zip(question_ids, questions_data)
+        ]
+
+    async def create_answers_to_questions(
+            self, questions_data: List[schemas.Question], question_ids: List[int], answer_ids: List[int]
+    ) -> Dict[int, List[schemas.AnswerResponse]]:
+        answer_ids = iter(answer_ids)
+        answers_by_question_id = dict()
+        values = list()
+        for question_data, question_id in zip(questions_data, question_ids):
+            answers = answers_by_question_id[question_id] = list()
+            for counter, answer_data in enumerate(question_data.answer_options):
+                answer = schemas.AnswerResponse(
+                    id=next(answer_ids), answer=answer_data, is_correct=counter == question_data.correct_answer
                 )
-            else:
-                answer = models.Answer(
-                    answer=answer_data,
-                    is_correct=False,
-                    question=question
-                )
-
-            self.db.add(answer)
-            await self.db.commit()
-            await self.db.refresh(answer)
-
-            answers_list.append(
-                schemas.AnswerResponse(
-                    id=answer.id, answer=answer.answer, is_correct=answer.is_correct
-                )
-            )
-
-            counter += 1
+                answers.append(answer)
+                values.append({
+                    "id": answer.id, "question_id": question_id, "answer": answer.answer, "is_correct": answer.is_correct
+                })
 
-        return answers_list
+        if values:
+            await self.db.execute(insert(models.Answer).values(values))
+        return answers_by_question_id
 
     async def add_questions_to_quiz(
             self, questions_data: List[schemas.Question], company_id: int, quiz_id: int, user_id: int
@@ -174,13 +213,10 @@ class QuizCrud:
         quiz = await self.get_quiz_by_id(quiz_id=quiz_id)
 
         questions = await self.create_questions_to_quiz(questions_data=questions_data, quiz=quiz)
+        self.bump_answer_key_version(quiz=quiz)
 
-        await self.db.refresh(quiz)
         quiz.number_of_questions += len(questions)
 
-        await self.db.commit()
-        await self.db.refresh(quiz)
-
         return schemas.QuizResponse(
             id=quiz.id,
             title=quiz.title,
@@ -197,15 +233,11 @@ class QuizCrud:
 
         quiz = await self.get_quiz_by_id(quiz_id=quiz_id)
 
-        await self.delete_answers_by_question_id(question_id=question_id)
         await self.delete_question_by_id_and_quiz_id(question_id=question_id, quiz_id=quiz_id)
+        self.bump_answer_key_version(quiz=quiz)
 
-        await self.db.refresh(quiz)
         quiz.number_of_questions -= 1
 
-        await self.db.commit()
-        await self.db.refresh(quiz)
-
         questions_list = list()
         questions = await self.get_questions_by_quiz_id(quiz_id=quiz_id)
         for question in questions:
@@ -228,35 +260,16 @@ class QuizCrud:
     async def delete_quiz(self, user_id: int, company_id: int, quiz_id: int):
         await self.check_main_role_by_user_id_and_company_id(user_id=user_id, company_id=company_id)
 
-        await self.delete_answers_by_quiz_id(quiz_id=quiz_id)
-        await self.delete_questions_by_quiz_id(quiz_id=quiz_id)
-
-        quiz = await self.get_quiz_by_id(quiz_id=quiz_id)
-        await self.db.delete(quiz)
-        await self.db.commit()
+        # Questions and answers go with it through ON DELETE CASCADE; quiz results are kept with quiz_id NULL
+        result = await self.db.execute(delete(models.Quiz).filter(
+            models.Quiz.id == quiz_id
+        ).returning(models.Quiz.id).execution_options(synchronize_session=False))
+        if result.scalar() is None:
+            raise HTTPException(status_code=404, detail="Not Found Quiz")
 
     async def delete_question_by_id_and_quiz_id(self, question_id: int, quiz_id: int):
-        question = await self.get_question_by_id_and_quiz_id(question_id=question_id, quiz_id=quiz_id)
-
-        await self.db.delete(question)
-        await self.db.commit()
-
-    async def delete_questions_by_quiz_id(self, quiz_id: int):
-        questions = await self.get_questions_by_quiz_id(quiz_id=quiz_id)
-
-        for question in questions:
-            await self.db.delete(question)
-        await self.db.commit()
-
-    async def delete_answers_by_question_id(self, question_id: int):
-        answers = await self.get_answers_by_question_id(question_id=question_id)
-        for answer in answers:
-            await self.db.delete(answer)
-        await self.db.commit()
-
-    async def delete_answers_by_quiz_id(self, quiz_id: int):
-        answers = await self.get_answers_by_quiz_id(quiz_id=quiz_id)
-
-        for answer in answers:
-            await self.db.delete(answer)
-        await self.db.commit()
+        result = await self.db.execute(delete(models.Question).filter(
+            (models.Question.id == question_id) & (models.Question.quiz_id == quiz_id)
+        ).returning(models.Question.id).execution_options(synchronize_session=False))
+        if result.scalar() is None:
+            raise HTTPException(status_code=404, detail="Not Found Question")
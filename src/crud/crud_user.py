@@ -1,31 +1,79 @@
-from typing import Optional, List, Union
-from sqlalchemy import select
+from typing import Optional, Union
+from sqlalchemy import delete, lambda_stmt, select
 from fastapi import HTTPException, Depends
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.async_sqlalchemy import paginate
 
-from src.database import AsyncSession, get_db_session
+from src.cache import TieredCache
+from src.config import Config
+from src.database import AsyncSession, get_db_session, after_commit
+from src.pagination import CursorPage, CursorParams, paginate_by_keyset
 from src import models, security, schemas
 
+user_cache = TieredCache(
+    namespace="user",
+    maxsize=Config.USER_CACHE_MAX_SIZE,
+    ttl=Config.USER_CACHE_TTL_SECONDS,
+    encode=schemas.User.json,
+    decode=schemas.User.parse_raw,
+    use_redis=Config.USER_CACHE_USE_REDIS
+)
+
 
 class UserCRUD:
 
     def __init__(self, db: AsyncSession = Depends(get_db_session)):
         self.db: AsyncSession = db
 
-    async def get_users(self, skip: int = 0, limit: int = 100) -> List[models.User]:
-        result = await self.db.execute(select(models.User).offset(skip).limit(limit))
-        return result.scalars().all()
+    async def get_users(self, params: Params) -> Page:
+        return await paginate(self.db, select(models.User).order_by(models.User.id), params)
+
+    async def get_users_by_cursor(self, params: CursorParams) -> CursorPage:
+        return await paginate_by_keyset(
+            self.db,
+            select(models.User),
+            keys=(models.User.date_created, models.User.id),
+            params=params,
+            count_key="users",
+            estimate_from_table="users"
+        )
 
     async def get_user(self, user_id: int) -> models.User:
-        result = await self.db.execute(select(models.User).filter(models.User.id == user_id))
+        result = await self.db.execute(lambda_stmt(lambda: select(models.User).filter(models.User.id == user_id)))
         result = result.scalars().first()
         if result is None:
             raise HTTPException(status_code=404, detail="Not Found User")
         return result
 
     async def get_user_by_email(self, email: str) -> models.User:
-        result = await self.db.execute(select(models.User).filter(models.User.email == email))
+        result = await self.db.execute(lambda_stmt(lambda: select(models.User).filter(models.User.email == email)))
         return result.scalars().first()
 
+    async def get_user_identity_by_email(self, email: str) -> Optional[schemas.User]:
+        user = await user_cache.get(f"email:{email}")
+        if user is not None:
+            return user
+
+        # Column projection: the cached identity needs no ORM instance, identity map entry or password hash
+        result = await self.db.execute(lambda_stmt(lambda: select(
+            models.User.id, models.User.first_name, models.User.last_name, models.User.email
+        ).filter(models.User.email == email)))
+        row = result.first()
+        if row is None:
+            return None
+
+        user = schemas.User(**row._mapping)
+        await user_cache.set(f"email:{user.email}", user)
+        return user
+
+    def invalidate_user_cache(self, email: str):
+        # Drop the cached identity only once the change is committed, otherwise a concurrent
+        # request could re-cache the old row between our delete and the commit
+        async def invalidate():
+            await user_cache.delete(f"email:{email}")
+
+        after_commit(self.db, invalidate)
+
     async def create_user(self, user: schemas.SignUp) -> models.User:
         hashed_password = await security.get_password_hash(user.password)
 
@@ -37,8 +85,8 @@ class UserCRUD:
         )
 
         self.db.add(db_user)
-        await self.db.commit()
-        await self.db.refresh(db_user)
+        await self.db.flush()
+        self.invalidate_user_cache(email=db_user.email)
         return db_user
 
     async def create_user_by_email(self, email: str) -> models.User:
@@ -46,8 +94,8 @@ class UserCRUD:
             email=email
         )
         self.db.add(db_user)
-        await self.db.commit()
-        await self.db.refresh(db_user)
+        await self.db.flush()
+        self.invalidate_user_cache(email=db_user.email)
         return db_user
 
     async def update_user_info(self, user_id: int, update_data: schemas.UserInfoUpdate) -> models.User:
@@ -58,8 +106,8 @@ class UserCRUD:
         if update_data.last_name is not None:
             user.last_name = update_data.last_name
 
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
+        self.invalidate_user_cache(email=user.email)
         return user
 
     async def update_user_password(
@@ -73,14 +121,18 @@ class UserCRUD:
         hashed_password = await security.get_password_hash(update_data.password)
         user.hashed_password = hashed_password
 
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
+        self.invalidate_user_cache(email=user.email)
         return user
 
     async def delete_user(self, user_id: int):
         user = await self.get_user(user_id=user_id)
-        await self.db.delete(user)
-        await self.db.commit()
+        email = user.email
+        # Memberships, requests and results go with it through ON DELETE CASCADE
+        await self.db.execute(
+            delete(models.User).filter(models.User.id == user_id).execution_options(synchronize_session=False)
+        )
+        self.invalidate_user_cache(email=email)
 
     async def authenticate(self, login_data: schemas.SignIn) -> Optional[models.User]:
         user = await self.get_user_by_email(email=login_data.email)
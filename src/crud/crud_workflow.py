@@ -1,17 +1,33 @@
 import csv
+import io
 import json
 
 import aioredis
 
 from datetime import datetime, timedelta
-from typing import List
-from sqlalchemy import select
-from fastapi import Depends
+from typing import AsyncIterator, Dict, List, Tuple
+from sqlalchemy import Float, cast, func, insert, lambda_stmt, select, update
+from fastapi import Depends, HTTPException
 
-from src.crud import QuizCrud, UserCRUD, CompanyCRUD
-from src.database import AsyncSession, get_db_session
-from src import schemas, models
 from src.config import Config
+from src.crud import QuizCrud, UserCRUD, CompanyCRUD, LeaderboardCrud
+from src.crud.projections import rows_to
+from src.database import AsyncSession, get_db_session, after_commit
+from src.resources import get_redis
+from src.rollups import in_window, record_attempt, rollup_gpa
+from src import schemas, models
+
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_COLUMNS = (
+    "quiz_result_id", "company_id", "quiz_id", "quiz_title", "date_of_passage",
+    "correct_answers", "number_of_questions", "gpa", "question_id", "answer_id"
+)
+
+
+def answers_key(user_id: int) -> str:
+    # question_id -> answer_id of the user's latest submission for that question
+    return f"answers:{user_id}"
 
 
 class WorkflowCrud:
@@ -19,137 +35,152 @@ class WorkflowCrud:
     def __init__(
             self,
             db: AsyncSession = Depends(get_db_session),
+            redis: aioredis.Redis = Depends(get_redis),
             quiz_crud: QuizCrud = Depends(),
             company_crud: CompanyCRUD = Depends(),
-            user_crud: UserCRUD = Depends()
+            user_crud: UserCRUD = Depends(),
+            leaderboard_crud: LeaderboardCrud = Depends()
     ):
         self.db: AsyncSession = db
+        self.redis: aioredis.Redis = redis
         self.quiz_crud = quiz_crud
         self.company_crud = company_crud
         self.user_crud = user_crud
+        self.leaderboard_crud = leaderboard_crud
 
     async def get_number_of_correct_answers(
-            self, answers_from_user: List[schemas.AnswersFromUser], quiz_id: int
+            self, answers_from_user: List[schemas.AnswersFromUser], quiz: models.Quiz
     ) -> int:
-        correct_answers = await self.quiz_crud.get_correct_answers_by_quiz_id(quiz_id=quiz_id)
+        answer_key = await self.quiz_crud.get_answer_key(quiz=quiz)
 
-        number_of_correct_answers = 0
+        # A question counts once, by the first answer submitted for it
+        answers_by_question_id = dict()
         for answer_from_user in answers_from_user:
-            for correct_answer in correct_answers:
-                if answer_from_user.question_id == correct_answer.question_id:
-                    if answer_from_user.answer_id == correct_answer.id:
-                        number_of_correct_answers += 1
-                        correct_answers.remove(correct_answer)
-                        break
+            answers_by_question_id.setdefault(answer_from_user.question_id, answer_from_user.answer_id)
 
-        return number_of_correct_answers
+        return sum(
+            1 for question_id, answer_id in answers_by_question_id.items() if answer_key.get(question_id) == answer_id
+        )
 
     async def get_general_result_by_user_and_company_id(self, user_id: int, company_id: int) -> models.GeneralResult:
-        result = await self.db.execute(select(models.GeneralResult).filter(
+        result = await self.db.execute(lambda_stmt(lambda: select(models.GeneralResult).filter(
             (models.GeneralResult.user_id == user_id) & (models.GeneralResult.company_id == company_id)
-        ))
+        )))
         return result.scalars().first()
 
-    async def create_quiz_result(
-            self,
-            answers_from_user: List[schemas.AnswersFromUser],
-            user_id: int,
-            quiz: models.Quiz,
-            general_result: models.GeneralResult
-    ):
-        redis = await aioredis.from_url(Config.REDIS_URL)
-        number_of_correct_answers = await self.get_number_of_correct_answers(
-            answers_from_user=answers_from_user, quiz_id=quiz.id
-        )
-        quiz_result = models.QuizResult(
-            correct_answers=number_of_correct_answers,
-            quiz=quiz,
-            general_result=general_result,
-            gpa=number_of_correct_answers/quiz.number_of_questions
-        )
-        self.db.add(quiz_result)
-        await self.db.commit()
-        await self.db.refresh(quiz_result)
-        for answer_from_user in answers_from_user:
-            await redis.set(f"{user_id}_{answer_from_user.question_id}", f"{answer_from_user.answer_id}")
-        return quiz_result
+    def store_answers(self, user_id: int, answers_from_user: List[schemas.AnswersFromUser]):
+        # One HSET for all answers plus the TTL refresh, in a single round trip
+        async def store():
+            if not answers_from_user:
+                return
+            key = answers_key(user_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping={
+                    answer_from_user.question_id: answer_from_user.answer_id for answer_from_user in answers_from_user
+                })
+                if Config.QUIZ_ANSWERS_TTL_SECONDS:
+                    pipe.expire(key, Config.QUIZ_ANSWERS_TTL_SECONDS)
+                await pipe.execute()
+
+        after_commit(self.db, store)
+
+    async def score_submission(
+            self, answers_from_user: List[schemas.AnswersFromUser], quiz_id: int
+    ) -> Tuple[models.Quiz, int]:
+        quiz = await self.quiz_crud.get_quiz_by_id(quiz_id=quiz_id)
+        if not quiz.number_of_questions:
+            raise HTTPException(status_code=400, detail="The quiz has no questions")
+
+        correct_answers = await self.get_number_of_correct_answers(answers_from_user=answers_from_user, quiz=quiz)
+        # A gpa above 1 would be summed into the running totals, rollups and leaderboards for good
+        return quiz, min(correct_answers, quiz.number_of_questions)
 
     async def create_general_result_for_user(
             self, answers_from_user: List[schemas.AnswersFromUser], quiz_id: int, company_id: int, user_id: int
     ) -> schemas.TestResponse:
-        user = await self.user_crud.get_user(user_id=user_id)
-        company = await self.company_crud.get_company_by_id(company_id=company_id)
-        quiz = await self.quiz_crud.get_quiz_by_id(quiz_id=quiz_id)
-        general_result = models.GeneralResult(
-            user=user,
-            company=company,
-        )
-        self.db.add(general_result)
-        await self.db.commit()
-        await self.db.refresh(general_result)
-
-        quiz_result = await self.create_quiz_result(
-            answers_from_user=answers_from_user, user_id=user_id, quiz=quiz, general_result=general_result
-        )
-
-        gpa = quiz_result.correct_answers / quiz.number_of_questions
-        general_result.gpa = gpa
-        await self.db.commit()
-        await self.db.refresh(quiz)
+        await self.company_crud.get_company_by_id(company_id=company_id)
+        quiz, correct_answers = await self.score_submission(answers_from_user=answers_from_user, quiz_id=quiz_id)
+        gpa = correct_answers / quiz.number_of_questions
+
+        # The general result and its first quiz result in one statement
+        general_result = insert(models.GeneralResult).values(
+            user_id=user_id,
+            company_id=company_id,
+            correct_answers=correct_answers,
+            number_of_questions=quiz.number_of_questions,
+            gpa=gpa
+        ).returning(models.GeneralResult.id).cte("general_result")
+        await self.db.execute(insert(models.QuizResult).values(
+            quiz_id=quiz.id,
+            general_result_id=select(general_result.c.id).scalar_subquery(),
+            correct_answers=correct_answers,
+            number_of_questions=quiz.number_of_questions,
+            gpa=gpa
+        ).add_cte(general_result))
+        await self.db.execute(record_attempt(
+            company_id=company_id, user_id=user_id, quiz_id=quiz.id,
+            correct_answers=correct_answers, number_of_questions=quiz.number_of_questions
+        ))
+        self.store_answers(user_id=user_id, answers_from_user=answers_from_user)
+        self.leaderboard_crud.set_score(company_id=company_id, user_id=user_id, gpa=gpa)
 
         return schemas.TestResponse(
             quiz_id=quiz_id,
             number_of_questions=quiz.number_of_questions,
-            correct_answers=quiz_result.correct_answers,
+            correct_answers=correct_answers,
             gpa=gpa
         )
 
-    async def get_gpa(self, quizzes_results: List[models.QuizResult]) -> float:
-        sum_of_correct_answers = 0
-        sum_of_questions = 0
-        for quiz_result in quizzes_results:
-            sum_of_correct_answers += quiz_result.correct_answers
-            quiz = await self.quiz_crud.get_quiz_by_id(quiz_id=quiz_result.quiz_id)
-            sum_of_questions += quiz.number_of_questions
-
-        gpa = sum_of_correct_answers/sum_of_questions
-        return gpa
-
-    async def get_all_gpa_by_user_id_and_time(self, user_id: int, time: datetime) -> List[models.GeneralResult]:
-        result = await self.db.execute(select(models.GeneralResult).filter(
-            (models.GeneralResult.user_id == user_id) & (models.GeneralResult.update_date >= time)
-        ))
-        return result.scalars().all()
-
     async def update_general_result_for_user(
             self, answers_from_user: List[schemas.AnswersFromUser], quiz_id: int, company_id: int, user_id: int
-    ):
-        quiz = await self.quiz_crud.get_quiz_by_id(quiz_id=quiz_id)
+    ) -> schemas.TestResponse:
+        quiz, correct_answers = await self.score_submission(answers_from_user=answers_from_user, quiz_id=quiz_id)
         general_result = await self.get_general_result_by_user_and_company_id(user_id=user_id, company_id=company_id)
 
-        quiz_result = await self.create_quiz_result(
-            answers_from_user=answers_from_user, user_id=user_id, quiz=quiz, general_result=general_result
+        # Bump the running totals and record the attempt in one statement, independent of history length.
+        # The SET expressions see the pre-update row, RETURNING sees the new one.
+        updated = update(models.GeneralResult).filter(models.GeneralResult.id == general_result.id).values(
+            correct_answers=models.GeneralResult.correct_answers + correct_answers,
+            number_of_questions=models.GeneralResult.number_of_questions + quiz.number_of_questions,
+            gpa=cast(models.GeneralResult.correct_answers + correct_answers, Float) /
+            (models.GeneralResult.number_of_questions + quiz.number_of_questions),
+            update_date=func.now()
+        ).returning(models.GeneralResult.id, models.GeneralResult.gpa).cte("updated")
+        inserted = insert(models.QuizResult).values(
+            quiz_id=quiz.id,
+            general_result_id=select(updated.c.id).scalar_subquery(),
+            correct_answers=correct_answers,
+            number_of_questions=quiz.number_of_questions,
+            gpa=correct_answers / quiz.number_of_questions
+        ).returning(models.QuizResult.general_result_id).cte("inserted")
+        result = await self.db.execute(
+            select(updated.c.gpa).join_from(updated, inserted, updated.c.id == inserted.c.general_result_id)
         )
-
-        gpa = await self.get_gpa(quizzes_results=general_result.quizzes_results)
-
-        general_result.gpa = gpa
-        await self.db.commit()
-        await self.db.refresh(quiz)
+        gpa = result.scalar_one()
+        await self.db.execute(record_attempt(
+            company_id=company_id, user_id=user_id, quiz_id=quiz.id,
+            correct_answers=correct_answers, number_of_questions=quiz.number_of_questions
+        ))
+        self.store_answers(user_id=user_id, answers_from_user=answers_from_user)
+        self.leaderboard_crud.set_score(company_id=company_id, user_id=user_id, gpa=gpa)
 
         return schemas.TestResponse(
             quiz_id=quiz_id,
             number_of_questions=quiz.number_of_questions,
-            correct_answers=quiz_result.correct_answers,
-            gpa=general_result.gpa
+            correct_answers=correct_answers,
+            gpa=gpa
         )
 
-    async def get_all_gpa_by_time_and_company_id(self, time: datetime, company_id: int) -> List[models.GeneralResult]:
-        result = await self.db.execute(select(models.GeneralResult).filter(
-            (models.GeneralResult.company_id == company_id) &
-            (models.GeneralResult.update_date >= time)
-        ))
-        return result.scalars().all()
+    async def get_all_gpa_by_time_and_company_id(
+            self, time: datetime, company_id: int
+    ) -> List[schemas.UserGPAResponse]:
+        # GPA over the attempts made since `time`, from the hourly/daily buckets rather than raw results
+        result = await self.db.execute(select(
+            models.GPARollup.user_id.label("user_id"), rollup_gpa().label("gpa")
+        ).filter(
+            (models.GPARollup.company_id == company_id) & in_window(time)
+        ).group_by(models.GPARollup.user_id).having(func.sum(models.GPARollup.number_of_questions) > 0))
+        return rows_to(schemas.UserGPAResponse, result)
 
     async def get_gpa_for_all_user(
             self, company_id: int, time_in_hours: int, user_id: int
@@ -159,26 +190,23 @@ class WorkflowCrud:
         )
         now_datetime = datetime.utcnow() - timedelta(hours=time_in_hours)
 
-        list_gpa_all_users = await self.get_all_gpa_by_time_and_company_id(time=now_datetime, company_id=company_id)
-        result = list()
-        for user_gpa in list_gpa_all_users:
-            result.append(
-                schemas.UserGPAResponse(
-                    user_id=user_gpa.id,
-                    gpa=user_gpa.gpa
-                )
-            )
-
-        return result
-
-    async def get_user_quizzes(self, user_id: int, company_id: int, time: datetime) -> List[models.QuizResult]:
-        result = await self.db.execute(select(models.QuizResult).join(models.GeneralResult).filter(
-            (models.GeneralResult.user_id == user_id) &
-            (models.GeneralResult.company_id == company_id) &
-            (models.GeneralResult.update_date >= time)
+        return await self.get_all_gpa_by_time_and_company_id(time=now_datetime, company_id=company_id)
 
+    async def get_user_quizzes(
+            self, user_id: int, company_id: int, time: datetime
+    ) -> List[schemas.UserGPAQuizResponse]:
+        result = await self.db.execute(select(
+            models.GPARollup.user_id.label("user_id"),
+            models.GPARollup.quiz_id.label("quiz_id"),
+            rollup_gpa().label("gpa")
+        ).filter(
+            (models.GPARollup.company_id == company_id) &
+            (models.GPARollup.user_id == user_id) &
+            in_window(time)
+        ).group_by(models.GPARollup.user_id, models.GPARollup.quiz_id).having(
+            func.sum(models.GPARollup.number_of_questions) > 0
         ))
-        return result.scalars().all()
+        return rows_to(schemas.UserGPAQuizResponse, result)
 
     async def get_gpa_all_user_quizzes(
             self, company_id: int, worker_id: int, time_in_hours: int, user_id: int
@@ -188,23 +216,7 @@ class WorkflowCrud:
         )
         datetime_for_filter = datetime.utcnow() - timedelta(hours=time_in_hours)
 
-        list_user_gpa_quizzes = await self.get_user_quizzes(
-            user_id=worker_id, company_id=company_id, time=datetime_for_filter
-        )
-        result = list()
-        for user_quiz_gpa in list_user_gpa_quizzes:
-            result.append(
-                schemas.UserGPAQuizResponse(
-                    user_id=worker_id,
-                    quiz_id=user_quiz_gpa.id,
-                    gpa=user_quiz_gpa.gpa
-                )
-            )
-        return result
-
-    async def get_quizzes_result_by_user_id(self, user_id: int) -> models.GeneralResult:
-        result = await self.db.execute(select(models.GeneralResult).filter(models.GeneralResult.user_id == user_id))
-        return result.scalars().first()
+        return await self.get_user_quizzes(user_id=worker_id, company_id=company_id, time=datetime_for_filter)
 
     async def get_users_with_time_of_last_test(
             self, company_id: int, user_id: int
@@ -213,63 +225,87 @@ class WorkflowCrud:
             company_id=company_id, user_id=user_id
         )
 
-        workers = await self.company_crud.get_workers_by_company_id(company_id=company_id)
-        result = list()
-        for worker in workers:
-            quizzes_result = await self.get_quizzes_result_by_user_id(user_id=worker.user_id)
-            if not quizzes_result:
-                result.append(
-                    schemas.UserWithTimeOfLastTestResponse(
-                        user_id=worker.user_id,
-                        time=None
-                    )
-                )
-            else:
-                result.append(
-                    schemas.UserWithTimeOfLastTestResponse(
-                        user_id=worker.user_id,
-                        time=quizzes_result.update_date
-                    )
-                )
-        return result
+        # One outer join instead of a general result lookup per worker
+        result = await self.db.execute(select(
+            models.Worker.user_id.label("user_id"), models.GeneralResult.update_date.label("time")
+        ).outerjoin(models.GeneralResult, (
+            (models.GeneralResult.user_id == models.Worker.user_id) &
+            (models.GeneralResult.company_id == models.Worker.company_id)
+        )).filter(models.Worker.company_id == company_id))
+        return rows_to(schemas.UserWithTimeOfLastTestResponse, result)
 
     async def get_my_gpa(self, user_id: int, time_in_hours: int) -> List[schemas.MyGPA]:
         datetime_for_filter = datetime.utcnow() - timedelta(hours=time_in_hours)
-        list_gpa = await self.get_all_gpa_by_user_id_and_time(user_id=user_id, time=datetime_for_filter)
-        result = list()
-        for gpa in list_gpa:
-            result.append(
-                schemas.MyGPA(
-                    company_id=gpa.company_id,
-                    gpa=gpa.gpa
-                )
-            )
-        return result
-
-    async def get_all_quizzes_result_by_user_id(self, user_id: int) -> List[models.QuizResult]:
-        result = await self.db.execute(select(models.QuizResult).join(models.GeneralResult).filter(
-            models.GeneralResult.user_id == user_id
-        ))
-        return result.scalars().all()
+        result = await self.db.execute(select(
+            models.GPARollup.company_id.label("company_id"), rollup_gpa().label("gpa")
+        ).filter(
+            (models.GPARollup.user_id == user_id) & in_window(datetime_for_filter)
+        ).group_by(models.GPARollup.company_id).having(func.sum(models.GPARollup.number_of_questions) > 0))
+        return rows_to(schemas.MyGPA, result)
 
     async def get_my_quizzes_with_time_of_last_test(self, user_id: int) -> List[schemas.QuizWithTimeOfLastTestResponse]:
-        quizzes_result = await self.get_all_quizzes_result_by_user_id(user_id=user_id)
-        result = list()
-        for quiz in quizzes_result:
-            result.append(
-                schemas.QuizWithTimeOfLastTestResponse(
-                    quiz_id=quiz.id,
-                    time=quiz.date_of_passage
-                )
-            )
-        return result
-
-    async def export_my_quizzes_results(self, user_id: int):
-        redis = await aioredis.from_url(Config.REDIS_URL)
-        keys = await redis.keys(f"*{user_id}*")
-
-        file = open("my_quizzes_results", "w", newline='')
-        # writer = csv.writer(file, delomiter=' ')
-        print(keys)
-        for key in keys:
-            answer = json.loads(await redis.get(key))
+        result = await self.db.execute(select(
+            models.QuizResult.quiz_id.label("quiz_id"), func.max(models.QuizResult.date_of_passage).label("time")
+        ).join(models.GeneralResult).filter(
+            (models.GeneralResult.user_id == user_id) & models.QuizResult.quiz_id.isnot(None)
+        ).group_by(models.QuizResult.quiz_id))
+        return rows_to(schemas.QuizWithTimeOfLastTestResponse, result)
+
+    async def get_stored_answers(self, user_id: int) -> Dict[int, int]:
+        # HSCAN walks only this user's hash, in batches, instead of the whole keyspace
+        return {
+            int(question_id): int(answer_id)
+            async for question_id, answer_id in self.redis.hscan_iter(answers_key(user_id), count=500)
+        }
+
+    async def export_my_quizzes_results(self, user_id: int, export_format: schemas.ExportFormat) -> AsyncIterator[str]:
+        """One line per (attempt, question) of the user's quiz results, oldest attempt first.
+
+        Rows come from a server-side cursor and are yielded in small batches, so memory
+        stays flat however long the history is. Redis keeps only the latest answer per
+        question, so answer_id is filled in for each quiz's latest attempt and null for
+        the older ones, whose answers are gone.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == schemas.ExportFormat.csv:
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        answers = await self.get_stored_answers(user_id=user_id)
+        # Ids grow with date_of_passage, so the highest one per quiz is its latest attempt
+        latest = await self.db.execute(select(func.max(models.QuizResult.id)).join(models.GeneralResult).filter(
+            (models.GeneralResult.user_id == user_id) & models.QuizResult.quiz_id.isnot(None)
+        ).group_by(models.QuizResult.quiz_id))
+        latest_attempts = set(latest.scalars().all())
+
+        result = await self.db.stream(select(
+            models.QuizResult.id.label("quiz_result_id"),
+            models.GeneralResult.company_id,
+            models.QuizResult.quiz_id,
+            models.Quiz.title.label("quiz_title"),
+            models.QuizResult.date_of_passage,
+            models.QuizResult.correct_answers,
+            models.QuizResult.number_of_questions,
+            models.QuizResult.gpa,
+            models.Question.id.label("question_id")
+        ).join(models.GeneralResult).outerjoin(models.Quiz).outerjoin(
+            models.Question, models.Question.quiz_id == models.QuizResult.quiz_id
+        ).filter(models.GeneralResult.user_id == user_id).order_by(
+            models.QuizResult.date_of_passage, models.QuizResult.id, models.Question.id
+        ).execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        async for rows in result.partitions():
+            for row in rows:
+                answer_id = answers.get(row.question_id) if row.quiz_result_id in latest_attempts else None
+                record = dict(row._mapping, answer_id=answer_id)
+                record["date_of_passage"] = row.date_of_passage.isoformat() if row.date_of_passage else None
+                if export_format == schemas.ExportFormat.csv:
+                    writer.writerow([record[column] for column in EXPORT_COLUMNS])
+                else:
+                    buffer.write(json.dumps(record) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
@@ -0,0 +1,14 @@
+from typing import Iterable, List, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+# Read-only list endpoints select just the columns their response schema needs, labelled with
+# the schema's field names, and build the schema from each row without an ORM entity in between.
+# construct() skips validation here because FastAPI validates the response model anyway.
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def rows_to(schema: Type[T], rows: Iterable[Row]) -> List[T]:
+    return [schema.construct(**row._mapping) for row in rows]
@@ -1,11 +1,74 @@
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import Config
 
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Records how long checkouts wait for a free (or newly opened) connection
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_timeouts = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.wait_timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.wait_count += 1
+                self.wait_total_seconds += elapsed
+                self.wait_max_seconds = max(self.wait_max_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": self.wait_count,
+            "checkout_timeouts": self.wait_timeouts,
+            "avg_wait_seconds": self.wait_total_seconds / self.wait_count if self.wait_count else 0.0,
+            "max_wait_seconds": self.wait_max_seconds
+        }
 
-engine = create_async_engine(Config.POSTGRES_URL)
+
+engine = create_async_engine(
+    Config.POSTGRES_URL,
+    poolclass=TimedQueuePool,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_timeout=Config.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=Config.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=Config.DB_POOL_PRE_PING,
+    connect_args={
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {"statement_timeout": str(Config.DB_STATEMENT_TIMEOUT_MS)}
+    }
+)
 SessionLocal = sessionmaker(
     class_=AsyncSession,
     autocommit=False,
@@ -15,6 +78,56 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
-async def get_db_session() -> AsyncSession:
+async def get_db_session(request: Request) -> AsyncSession:
     async with SessionLocal() as session:
+        request.state.db_session = session
         yield session
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[Any]]):
+    # Side effects outside Postgres (caches, Redis) that must only happen once the data is durable
+    session.info.setdefault("after_commit", list()).append(callback)
+
+
+async def commit_unit_of_work(session: AsyncSession):
+    await session.commit()
+
+    callbacks = session.info.pop("after_commit", list())
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception:
+            logger.exception("after_commit callback failed")
+
+
+async def rollback_unit_of_work(session: AsyncSession):
+    session.info.pop("after_commit", None)
+    await session.rollback()
+
+
+class UnitOfWorkRoute(APIRoute):
+    # CRUD methods only flush; the request's session is committed exactly once here, after the
+    # endpoint returns but before the response is sent, and rolled back if the endpoint raises
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        route_handler = super().get_route_handler()
+
+        async def unit_of_work_route_handler(request: Request) -> Response:
+            try:
+                response = await route_handler(request)
+            except Exception:
+                session = getattr(request.state, "db_session", None)
+                if session is not None:
+                    await rollback_unit_of_work(session)
+                raise
+
+            session = getattr(request.state, "db_session", None)
+            if session is not None:
+                await commit_unit_of_work(session)
+            return response
+
+        return unit_of_work_route_handler
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    return engine.pool.stats()
@@ -0,0 +1,262 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+from src import models, schemas
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+EXPORT_QUEUE_KEY = "export:queue"
+# Jobs a worker has taken and not yet finished, shared by all workers
+EXPORT_PROCESSING_KEY = "export:processing"
+
+# Exports never borrow from the request pool: their own capped pool, a longer statement
+# timeout, and a connection only for the duration of each chunk's query
+export_engine = create_async_engine(
+    Config.POSTGRES_URL,
+    pool_size=Config.EXPORT_DB_POOL_SIZE,
+    max_overflow=0,
+    pool_recycle=Config.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=Config.DB_POOL_PRE_PING,
+    connect_args={
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "statement_timeout": str(Config.EXPORT_DB_STATEMENT_TIMEOUT_MS),
+            "application_name": "export_worker"
+        }
+    }
+)
+ExportSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    bind=export_engine)
+
+
+def export_job_key(job_id: str) -> str:
+    return f"export:job:{job_id}"
+
+
+def export_job_dir(job_id: str) -> str:
+    return os.path.join(Config.EXPORT_DIR, job_id)
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def decode_export_job(job_id: str, raw: Dict[bytes, bytes]) -> schemas.ExportJob:
+    job = {key.decode(): value.decode() for key, value in raw.items()}
+    job["parts"] = json.loads(job.get("parts") or "[]")
+    job["error"] = job.get("error") or None
+    return schemas.ExportJob(id=job_id, **job)
+
+
+def export_queries(company_id: int) -> List[Tuple[str, InstrumentedAttribute, Select]]:
+    # (part name prefix, unique key the chunks are seeked by, rows of the company)
+    return [
+        ("general_results", models.GeneralResult.id, select(
+            models.GeneralResult.id,
+            models.GeneralResult.user_id,
+            models.GeneralResult.company_id,
+            models.GeneralResult.gpa,
+            models.GeneralResult.correct_answers,
+            models.GeneralResult.number_of_questions,
+            models.GeneralResult.update_date
+        ).filter(models.GeneralResult.company_id == company_id)),
+        ("quizzes_results", models.QuizResult.id, select(
+            models.QuizResult.id,
+            models.GeneralResult.user_id,
+            models.QuizResult.general_result_id,
+            models.QuizResult.quiz_id,
+            models.QuizResult.correct_answers,
+            models.QuizResult.number_of_questions,
+            models.QuizResult.gpa,
+            models.QuizResult.date_of_passage
+        ).join(models.GeneralResult).filter(models.GeneralResult.company_id == company_id)),
+    ]
+
+
+def write_part(path: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+    )
+
+    # Written aside and renamed, so a download never sees a half-written part
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(gzip.compress(buffer.getvalue().encode()))
+    os.replace(f"{path}.tmp", path)
+
+
+def prune_expired_exports():
+    # The job hashes expire in Redis; their parts on disk go once they are as old
+    if not os.path.isdir(Config.EXPORT_DIR):
+        return
+    expired_before = time.time() - Config.EXPORT_JOB_TTL_SECONDS
+    for entry in os.scandir(Config.EXPORT_DIR):
+        if entry.is_dir() and entry.stat().st_mtime < expired_before:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+class ExportWorker:
+    """Takes export jobs off the Redis queue one at a time and writes them out in chunks.
+
+    scripts/export_worker.py runs it as its own process, so a large export never
+    competes with API requests for the event loop; EXPORT_WORKER_ENABLED=true also
+    starts one inside every API process. BRPOPLPUSH hands each job to exactly one
+    worker and keeps it in the processing list until its final status is written.
+    A worker that is stopped marks its job failed itself; one that dies leaves the
+    job behind in the list, and any worker fails it once it has gone
+    EXPORT_JOB_STALE_SECONDS without progress.
+    """
+
+    def __init__(self, poll_timeout: int = 5, prune_interval: int = 600):
+        self.poll_timeout = poll_timeout
+        self.prune_interval = prune_interval
+        self.redis: Optional[aioredis.Redis] = None
+        self.last_prune: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, redis: aioredis.Redis):
+        self.redis = redis
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await export_engine.dispose()
+
+    async def run(self):
+        while True:
+            try:
+                job_id = await self.redis.brpoplpush(
+                    EXPORT_QUEUE_KEY, EXPORT_PROCESSING_KEY, timeout=self.poll_timeout
+                )
+            except aioredis.RedisError as error:
+                logger.warning("export queue: redis brpoplpush failed: %s", error)
+                await asyncio.sleep(self.poll_timeout)
+                continue
+
+            # Nothing may end the loop but cancellation: a dead task would leave every later job queued
+            try:
+                if job_id is not None:
+                    await self.process(job_id.decode())
+                elif time.monotonic() - self.last_prune >= self.prune_interval:
+                    self.last_prune = time.monotonic()
+                    await self.fail_abandoned_jobs()
+                    await asyncio.to_thread(prune_expired_exports)
+            except Exception:
+                logger.exception("export worker: iteration failed")
+                await asyncio.sleep(self.poll_timeout)
+
+    async def update_job(self, job_id: str, **fields: Any):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(export_job_key(job_id), mapping={**fields, "updated_at": utc_now()})
+            pipe.expire(export_job_key(job_id), Config.EXPORT_JOB_TTL_SECONDS)
+            await pipe.execute()
+
+    async def finish(self, job_id: str):
+        # Only once the final status is written; until then the job stays recoverable
+        await self.redis.lrem(EXPORT_PROCESSING_KEY, 1, job_id)
+
+    async def fail_abandoned_jobs(self):
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=Config.EXPORT_JOB_STALE_SECONDS)
+        for raw_id in await self.redis.lrange(EXPORT_PROCESSING_KEY, 0, -1):
+            job_id = raw_id.decode()
+            raw = await self.redis.hgetall(export_job_key(job_id))
+            if raw:
+                job = decode_export_job(job_id, raw)
+                if job.updated_at > stale_before:
+                    continue
+                logger.warning("export job %s was abandoned by its worker", job_id)
+                await self.update_job(
+                    job_id, status=schemas.ExportJobStatus.failed.value,
+                    error="The export worker stopped while running it"
+                )
+            await self.finish(job_id)
+
+    async def process(self, job_id: str):
+        raw = await self.redis.hgetall(export_job_key(job_id))
+        if not raw:
+            # Expired before a worker got to it
+            await self.finish(job_id)
+            return
+        job = decode_export_job(job_id, raw)
+
+        await self.update_job(job_id, status=schemas.ExportJobStatus.running.value)
+        try:
+            await self.export(job)
+        except asyncio.CancelledError:
+            await self.update_job(
+                job_id, status=schemas.ExportJobStatus.failed.value, error="The export worker was stopped"
+            )
+            await self.finish(job_id)
+            raise
+        except Exception as error:
+            logger.exception("export job %s failed", job_id)
+            await self.update_job(
+                job_id, status=schemas.ExportJobStatus.failed.value, error=str(error) or type(error).__name__
+            )
+        else:
+            await self.update_job(job_id, status=schemas.ExportJobStatus.done.value)
+        await self.finish(job_id)
+
+    async def export(self, job: schemas.ExportJob):
+        directory = export_job_dir(job.id)
+        await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+
+        rows_total = 0
+        parts = list()
+        for name, key, query in export_queries(job.company_id):
+            last_id = 0
+            part_number = 0
+            while True:
+                # A short transaction per chunk: no snapshot or connection held across the whole export
+                async with ExportSessionLocal() as session:
+                    result = await session.execute(
+                        query.filter(key > last_id).order_by(key).limit(Config.EXPORT_CHUNK_SIZE)
+                    )
+                    columns = list(result.keys())
+                    rows = result.all()
+
+                # An empty dataset still gets one part with just the header
+                if not rows and part_number:
+                    break
+
+                part = f"{name}-{part_number:05d}.csv.gz"
+                await asyncio.to_thread(write_part, os.path.join(directory, part), columns, rows)
+                parts.append(part)
+                rows_total += len(rows)
+                part_number += 1
+                await self.update_job(job.id, rows=rows_total, parts=json.dumps(parts))
+
+                if len(rows) < Config.EXPORT_CHUNK_SIZE:
+                    break
+                last_id = rows[-1][0]
+
+
+export_worker = ExportWorker()
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import jwt
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+
+    def __init__(self, ttl: int = Config.JWKS_CACHE_TTL_SECONDS, min_refresh_interval: int = 30):
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Dict[str, jwt.PyJWK] = dict()
+        self.last_refresh: float = 0.0
+        self._client: Optional[jwt.PyJWKClient] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> jwt.PyJWKClient:
+        if self._client is None:
+            jwks_url = f"{Config.AUTH0_BASE_URL}/.well-known/jwks.json"
+            self._client = jwt.PyJWKClient(jwks_url, cache_jwk_set=False)
+        return self._client
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so the lock binds to the server's running loop, not the import-time one
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except jwt.exceptions.PyJWKClientError as error:
+            logger.warning("JWKS preload failed: %s", error)
+        self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self):
+        async with self.lock:
+            await self._fetch()
+
+    async def _fetch(self):
+        # PyJWKClient fetches with urllib, so keep the blocking call off the event loop
+        signing_keys = await asyncio.to_thread(self.client.get_signing_keys, True)
+        self.keys = {key.key_id: key for key in signing_keys}
+        self.last_refresh = time.monotonic()
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.refresh()
+            except jwt.exceptions.PyJWKClientError as error:
+                logger.warning("JWKS refresh failed, keeping %s cached keys: %s", len(self.keys), error)
+
+    async def get_signing_key(self, kid: str) -> jwt.PyJWK:
+        signing_key = self.keys.get(kid)
+        if signing_key is not None:
+            return signing_key
+
+        # Unknown kid: the issuer may have rotated keys, re-fetch once but never more
+        # often than min_refresh_interval so forged kids cannot hammer the JWKS endpoint
+        async with self.lock:
+            signing_key = self.keys.get(kid)
+            if signing_key is None and time.monotonic() - self.last_refresh >= self.min_refresh_interval:
+                await self._fetch()
+                signing_key = self.keys.get(kid)
+
+        if signing_key is None:
+            raise jwt.exceptions.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return signing_key
+
+    async def get_signing_key_from_jwt(self, token: str) -> jwt.PyJWK:
+        header = jwt.get_unverified_header(token)
+        return await self.get_signing_key(header.get("kid"))
+
+
+jwks_cache = JWKSCache()
@@ -1,17 +1,12 @@
 import os
 import logging.config
-import databases
-import aioredis
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import add_pagination
 
 from src import routes
-from src.config import Config
-from src.database import get_db_session
-
-db = databases.Database(Config.POSTGRES_URL)
+from src.resources import resources
 
 app = FastAPI()
 
@@ -23,6 +18,7 @@ app.include_router(routes.notifications_router)
 app.include_router(routes.quiz_router)
 app.include_router(routes.workflow_router)
 app.include_router(routes.export_router)
+app.include_router(routes.metrics_router)
 
 add_pagination(app)
 
@@ -43,14 +39,12 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup():
     # logger.info("START")
-    await db.connect()
-    app.state.redis = await aioredis.from_url(Config.REDIS_URL)
+    await resources.startup()
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    await db.disconnect()
-    await app.state.redis.close()
+    await resources.shutdown()
 
 
 @app.get('/')
@@ -2,4 +2,4 @@ from .user import User
 from .company import Company
 from .worker import Worker
 from .request import Request
-from .quiz import Quiz, Question, Answer, GeneralResult, QuizResult
+from .quiz import Quiz, Question, Answer, GeneralResult, QuizResult, GPARollup
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from .worker import Worker
@@ -7,13 +7,16 @@ from src.database import Base
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        Index("ix_companies_hidden_id", "hidden", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String)
     description = Column(String)
     hidden = Column(Boolean, default=False)
 
-    workers = relationship("Worker", back_populates="company", lazy='selectin')
-    requests = relationship("Request", back_populates="company", lazy='selectin')
-    quizzes = relationship("Quiz", back_populates="company", lazy='selectin')
-    general_results = relationship("GeneralResult", back_populates="company", lazy='selectin')
+    workers = relationship("Worker", back_populates="company", lazy='raise', passive_deletes=True)
+    requests = relationship("Request", back_populates="company", lazy='raise', passive_deletes=True)
+    quizzes = relationship("Quiz", back_populates="company", lazy='raise', passive_deletes=True)
+    general_results = relationship("GeneralResult", back_populates="company", lazy='raise', passive_deletes=True)
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, Float
+import enum
+
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, Float, Index, Enum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -8,64 +10,114 @@ from src.database import Base
 
 class Quiz(Base):
     __tablename__ = "quizzes"
+    __table_args__ = (
+        Index("ix_quizzes_company_id_id", "company_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"))
     title = Column(String)
     description = Column(String)
     passing_frequency = Column(Integer)
     number_of_questions = Column(Integer)
+    # Bumped whenever the questions change; part of the answer key's cache key
+    answer_key_version = Column(Integer, nullable=False, default=0, server_default="0")
 
-    company = relationship("Company", back_populates="quizzes", lazy='selectin')
-    questions = relationship("Question", back_populates="quiz", lazy='selectin')
-    quizzes_results = relationship("QuizResult", back_populates="quiz", lazy='selectin')
+    company = relationship("Company", back_populates="quizzes", lazy='raise')
+    questions = relationship("Question", back_populates="quiz", lazy='raise', passive_deletes=True)
+    quizzes_results = relationship("QuizResult", back_populates="quiz", lazy='raise', passive_deletes=True)
 
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_quiz_id", "quiz_id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"))
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"))
     question = Column(String)
 
-    quiz = relationship("Quiz", back_populates="questions", lazy='selectin')
-    answers = relationship("Answer", back_populates="question", lazy='selectin')
+    quiz = relationship("Quiz", back_populates="questions", lazy='raise')
+    answers = relationship("Answer", back_populates="question", lazy='raise', passive_deletes=True)
 
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_question_id_is_correct", "question_id", "is_correct"),
+    )
 
     id = Column(Integer, primary_key=True)
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"))
     answer = Column(String)
     is_correct = Column(Boolean, default=False)
 
-    question = relationship("Question", back_populates="answers", lazy='selectin')
+    question = relationship("Question", back_populates="answers", lazy='raise')
 
 
 class GeneralResult(Base):
     __tablename__ = "general_results"
+    __table_args__ = (
+        Index("ix_general_results_user_id_company_id", "user_id", "company_id"),
+        Index("ix_general_results_company_id_update_date", "company_id", "update_date"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"))
     gpa = Column(Float)
+    # Running totals over quizzes_results, kept up to date by the submission statement
+    correct_answers = Column(Integer, nullable=False, default=0, server_default="0")
+    number_of_questions = Column(Integer, nullable=False, default=0, server_default="0")
     update_date = Column(DateTime(timezone=True), default=func.now())
 
-    user = relationship("User", back_populates="general_results", lazy='selectin')
-    company = relationship("Company", back_populates="general_results", lazy='selectin')
-    quizzes_results = relationship("QuizResult", back_populates="general_result", lazy='selectin')
+    user = relationship("User", back_populates="general_results", lazy='raise')
+    company = relationship("Company", back_populates="general_results", lazy='raise')
+    quizzes_results = relationship("QuizResult", back_populates="general_result", lazy='raise', passive_deletes=True)
 
 
 class QuizResult(Base):
     __tablename__ = "quizzes_results"
+    __table_args__ = (
+        Index("ix_quizzes_results_general_result_id_date_of_passage", "general_result_id", "date_of_passage"),
+    )
 
     id = Column(Integer, primary_key=True)
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"))
-    general_result_id = Column(Integer, ForeignKey("general_results.id"))
+    # SET NULL: the attempt stays in the general result's running totals after its quiz is gone
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="SET NULL"))
+    general_result_id = Column(Integer, ForeignKey("general_results.id", ondelete="CASCADE"))
     correct_answers = Column(Integer)
+    # Snapshot of quizzes.number_of_questions when the quiz was taken
+    number_of_questions = Column(Integer)
     gpa = Column(Float)
     date_of_passage = Column(DateTime(timezone=True), default=func.now())
 
-    quiz = relationship("Quiz", back_populates="quizzes_results", lazy='selectin')
-    general_result = relationship("GeneralResult", back_populates="quizzes_results", lazy='selectin')
+    quiz = relationship("Quiz", back_populates="quizzes_results", lazy='raise')
+    general_result = relationship("GeneralResult", back_populates="quizzes_results", lazy='raise')
+
+
+class RollupGranularity(enum.Enum):
+    hour = "hour"
+    day = "day"
+
+
+class GPARollup(Base):
+    # Attempts per (company, user, quiz) and UTC bucket. The current hour is upserted on every
+    # submission; hours past GPA_ROLLUP_HOURLY_RETENTION_HOURS are folded into whole days
+    __tablename__ = "gpa_rollups"
+    __table_args__ = (
+        Index("ix_gpa_rollups_company_id_bucket_start", "company_id", "bucket_start"),
+        Index("ix_gpa_rollups_user_id_bucket_start", "user_id", "bucket_start"),
+        Index("ix_gpa_rollups_granularity_bucket_start", "granularity", "bucket_start"),
+    )
+
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # No foreign key: like the quiz results it sums, a bucket outlives its quiz
+    quiz_id = Column(Integer, primary_key=True)
+    granularity = Column(Enum(RollupGranularity, name="rollup_granularity"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    correct_answers = Column(Integer, nullable=False, default=0, server_default="0")
+    number_of_questions = Column(Integer, nullable=False, default=0, server_default="0")
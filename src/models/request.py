@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, ForeignKey, Enum
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 
 from src.database import Base
@@ -19,12 +19,16 @@ class RequestStatus(enum.Enum):
 
 class Request(Base):
     __tablename__ = "requests"
+    __table_args__ = (
+        Index("ix_requests_company_id_status_request_from", "company_id", "status", "request_from"),
+        Index("ix_requests_user_id_company_id", "user_id", "company_id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"))
     request_from = Column(Enum(RequestFrom))
     status = Column(Enum(RequestStatus), default=RequestStatus.pending)
 
-    user = relationship("User", back_populates="requests", lazy='selectin')
-    company = relationship("Company", back_populates="requests", lazy='selectin')
+    user = relationship("User", back_populates="requests", lazy='raise')
+    company = relationship("Company", back_populates="requests", lazy='raise')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, String, Integer, DateTime, Index
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql import func
 
@@ -7,6 +7,9 @@ from src.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_date_created_id", "date_created", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     first_name = Column(String, default=None)
@@ -15,6 +18,6 @@ class User(Base):
     hashed_password = Column(String, default=None)
     date_created = Column(DateTime(timezone=True), default=func.now())
 
-    workers = relationship("Worker", back_populates="user", lazy='selectin')
-    requests = relationship("Request", back_populates="user", lazy='selectin')
-    general_results = relationship("GeneralResult", back_populates="user", lazy='selectin')
+    workers = relationship("Worker", back_populates="user", lazy='raise', passive_deletes=True)
+    requests = relationship("Request", back_populates="user", lazy='raise', passive_deletes=True)
+    general_results = relationship("GeneralResult", back_populates="user", lazy='raise', passive_deletes=True)
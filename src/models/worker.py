@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, ForeignKey, Enum
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship, backref
 
 from src.database import Base
@@ -14,12 +14,16 @@ class Role(enum.Enum):
 
 class Worker(Base):
     __tablename__ = "workers"
+    __table_args__ = (
+        Index("ix_workers_user_id_company_id_role", "user_id", "company_id", "role"),
+        Index("ix_workers_company_id_role", "company_id", "role"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"))
     role = Column(Enum(Role), default=Role.staff)
 
-    user = relationship("User", back_populates="workers", lazy='selectin')
-    company = relationship("Company", back_populates="workers", lazy='selectin')
+    user = relationship("User", back_populates="workers", lazy='raise')
+    company = relationship("Company", back_populates="workers", lazy='raise')
 
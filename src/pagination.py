@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic.generics import GenericModel
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+from src.cache import TieredCache
+from src.config import Config
+from src.database import AsyncSession
+
+T = TypeVar("T")
+
+count_cache = TieredCache(namespace="count", maxsize=1000, ttl=Config.COUNT_CACHE_TTL_SECONDS)
+
+
+class CursorParams:
+
+    def __init__(
+            self,
+            cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+            size: int = Query(50, ge=1, le=500),
+            include_total: bool = Query(False, description="add an estimated total (pg_class or a cached COUNT)")
+    ):
+        self.cursor = cursor
+        self.size = size
+        self.include_total = include_total
+
+
+class CursorPage(GenericModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    estimated_total: Optional[int] = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if key.type.python_type is datetime else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def estimate_table_rows(db: AsyncSession, table_name: str) -> Optional[int]:
+    # Planner statistics: free to read, refreshed by autovacuum/ANALYZE, -1 if never analyzed
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)"),
+        {"table_name": table_name}
+    )
+    estimate = result.scalar()
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+async def cached_count(db: AsyncSession, query: Select, count_key: str) -> int:
+    total = await count_cache.get(count_key)
+    if total is None:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        await count_cache.set(count_key, total)
+    return total
+
+
+async def paginate_by_keyset(
+        db: AsyncSession,
+        query: Select,
+        keys: Sequence[InstrumentedAttribute],
+        params: CursorParams,
+        count_key: str,
+        estimate_from_table: Optional[str] = None
+) -> CursorPage:
+    """Page through query in (keys) order, seeking past the last row of the previous page.
+
+    keys must end with a unique column and be covered by an index that also covers
+    the query's filters, so every page is an index range scan of `size` rows no
+    matter how deep it is. estimate_from_table only makes sense for unfiltered
+    queries; otherwise the total is a COUNT cached for COUNT_CACHE_TTL_SECONDS.
+    """
+    page_query = query
+    if params.cursor:
+        page_query = page_query.filter(tuple_(*keys) > tuple_(*decode_cursor(params.cursor, keys)))
+
+    result = await db.execute(page_query.order_by(*keys).limit(params.size + 1))
+    items = result.scalars().all()
+
+    next_cursor = None
+    if len(items) > params.size:
+        items = items[:params.size]
+        next_cursor = encode_cursor([getattr(items[-1], key.key) for key in keys])
+
+    estimated_total = None
+    if params.include_total:
+        if estimate_from_table is not None:
+            estimated_total = await estimate_table_rows(db, estimate_from_table)
+        if estimated_total is None:
+            estimated_total = await cached_count(db, query, count_key)
+
+    return CursorPage(items=items, next_cursor=next_cursor, estimated_total=estimated_total)
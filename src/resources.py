@@ -0,0 +1,63 @@
+from typing import Optional
+
+import aioredis
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.cache import attach_redis
+from src.config import Config
+from src.database import engine
+from src.export_worker import ExportWorker, export_worker
+from src.auth0_client import Auth0Client, auth0_client
+from src.jwks import JWKSCache, jwks_cache
+from src.rollups import RollupCompactor, rollup_compactor
+from src.security import PasswordHasher, password_hasher
+
+
+class Resources:
+    # Every process-wide client lives here so startup and shutdown happen in one place
+
+    def __init__(self):
+        self.engine: AsyncEngine = engine
+        self.redis: Optional[aioredis.Redis] = None
+        self.auth0_client: Auth0Client = auth0_client
+        self.jwks_cache: JWKSCache = jwks_cache
+        self.password_hasher: PasswordHasher = password_hasher
+        self.export_worker: ExportWorker = export_worker
+        self.rollup_compactor: RollupCompactor = rollup_compactor
+
+    async def startup(self):
+        Config.AUTH0.validate()
+
+        self.redis = aioredis.from_url(Config.REDIS_URL, max_connections=Config.REDIS_MAX_CONNECTIONS)
+        attach_redis(self.redis)
+
+        await self.jwks_cache.start()
+        await self.auth0_client.start()
+        if Config.EXPORT_WORKER_ENABLED:
+            await self.export_worker.start(self.redis)
+        await self.rollup_compactor.start()
+
+    async def shutdown(self):
+        await self.export_worker.stop()
+        await self.rollup_compactor.stop()
+        await self.jwks_cache.stop()
+        await self.auth0_client.close()
+
+        attach_redis(None)
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+        self.password_hasher.shutdown()
+        await self.engine.dispose()
+
+
+resources = Resources()
+
+
+async def get_redis() -> aioredis.Redis:
+    return resources.redis
+
+
+async def get_auth0_client() -> Auth0Client:
+    return resources.auth0_client
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Float, cast, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import ColumnElement, Insert
+
+from src.config import Config
+from src.database import AsyncSession, SessionLocal
+from src.models.quiz import GPARollup, RollupGranularity
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_KEY = ("company_id", "user_id", "quiz_id", "granularity", "bucket_start")
+
+
+def add_to_existing(statement: Insert) -> Insert:
+    # Buckets only ever grow: on conflict, add the new counts to the stored ones
+    return statement.on_conflict_do_update(index_elements=ROLLUP_KEY, set_={
+        "attempts": GPARollup.attempts + statement.excluded.attempts,
+        "correct_answers": GPARollup.correct_answers + statement.excluded.correct_answers,
+        "number_of_questions": GPARollup.number_of_questions + statement.excluded.number_of_questions
+    })
+
+
+def record_attempt(
+        company_id: int, user_id: int, quiz_id: int, correct_answers: int, number_of_questions: int
+) -> Insert:
+    return add_to_existing(insert(GPARollup).values(
+        company_id=company_id,
+        user_id=user_id,
+        quiz_id=quiz_id,
+        granularity=RollupGranularity.hour,
+        bucket_start=func.date_trunc("hour", func.timezone("UTC", func.now())),
+        attempts=1,
+        correct_answers=correct_answers,
+        number_of_questions=number_of_questions
+    ))
+
+
+def in_window(since: datetime) -> ColumnElement:
+    """Buckets covering attempts from `since` (naive UTC) onwards.
+
+    Every hour lives in exactly one bucket, hourly or daily, so the two never double
+    count. The window is hour-precise inside the hourly retention; older starts are
+    rounded down to the start of their day.
+    """
+    hour_start = since.replace(minute=0, second=0, microsecond=0)
+    day_start = since.replace(hour=0, minute=0, second=0, microsecond=0)
+    # The leading bound is implied by the rest but gives the planner a plain index range
+    return (GPARollup.bucket_start >= day_start) & (
+        ((GPARollup.granularity == RollupGranularity.hour) & (GPARollup.bucket_start >= hour_start)) |
+        (GPARollup.granularity == RollupGranularity.day)
+    )
+
+
+def rollup_gpa() -> ColumnElement:
+    return cast(func.sum(GPARollup.correct_answers), Float) / func.nullif(func.sum(GPARollup.number_of_questions), 0)
+
+
+def compaction_cutoff(now: Optional[datetime] = None) -> datetime:
+    # Whole days only, so a daily bucket never has hours left behind in the hourly ones
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=Config.GPA_ROLLUP_HOURLY_RETENTION_HOURS)
+    return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def compact_rollups(db: AsyncSession, cutoff: datetime) -> int:
+    # Delete the old hourly buckets and add them into their days in one statement, so a
+    # crash or a concurrent compaction can neither lose nor double count an hour
+    moved = delete(GPARollup).filter(
+        (GPARollup.granularity == RollupGranularity.hour) & (GPARollup.bucket_start < cutoff)
+    ).returning(
+        GPARollup.company_id, GPARollup.user_id, GPARollup.quiz_id, GPARollup.bucket_start,
+        GPARollup.attempts, GPARollup.correct_answers, GPARollup.number_of_questions
+    ).cte("moved")
+    day = func.date_trunc("day", moved.c.bucket_start)
+    result = await db.execute(add_to_existing(insert(GPARollup).from_select(
+        [
+            "company_id", "user_id", "quiz_id", "granularity", "bucket_start",
+            "attempts", "correct_answers", "number_of_questions"
+        ],
+        select(
+            moved.c.company_id, moved.c.user_id, moved.c.quiz_id,
+            literal(RollupGranularity.day, GPARollup.granularity.type), day,
+            func.sum(moved.c.attempts), func.sum(moved.c.correct_answers), func.sum(moved.c.number_of_questions)
+        ).group_by(moved.c.company_id, moved.c.user_id, moved.c.quiz_id, day)
+    ).add_cte(moved)))
+    return result.rowcount
+
+
+class RollupCompactor:
+    # Runs compact_rollups every GPA_ROLLUP_COMPACT_INTERVAL_SECONDS; scripts/compact_gpa_rollups.py does it on demand
+
+    def __init__(self, interval: int = Config.GPA_ROLLUP_COMPACT_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.interval:
+            self._task = asyncio.create_task(self._compact_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _compact_periodically(self):
+        while True:
+            try:
+                async with SessionLocal() as session:
+                    compacted = await compact_rollups(session, cutoff=compaction_cutoff())
+                    await session.commit()
+                if compacted:
+                    logger.info("compacted hourly gpa rollups into %s daily buckets", compacted)
+            except Exception:
+                logger.exception("gpa rollup compaction failed")
+            await asyncio.sleep(self.interval)
+
+
+rollup_compactor = RollupCompactor()
@@ -6,3 +6,4 @@ from .notifications import router as notifications_router
 from .quiz import router as quiz_router
 from .workflow import router as workflow_router
 from .export import router as export_router
+from .metrics import router as metrics_router
@@ -1,13 +1,13 @@
-import http.client
-
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPBearer
 
-from src import schemas, models, security
+from src import schemas, security
+from src.auth0_client import Auth0Client, Auth0Error, Auth0UnavailableError
 from src.crud import UserCRUD
-from src.database import AsyncSession, get_db_session
+from src.database import AsyncSession, get_db_session, UnitOfWorkRoute
 from src.config import Config
+from src.resources import get_auth0_client
 from src.routes.dependencies import get_current_user
 
 token_auth_scheme = HTTPBearer()
@@ -15,7 +15,8 @@ token_auth_scheme = HTTPBearer()
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
 
@@ -31,30 +32,26 @@ async def sign_in(user_login_data: schemas.SignIn, user_crud: UserCRUD = Depends
 
 
 @router.get("/login/me", response_model=schemas.User)
-async def get_me(current_user: models.User = Depends(get_current_user)) -> schemas.User:
+async def get_me(current_user: schemas.User = Depends(get_current_user)) -> schemas.User:
     return current_user
 
 
 @router.post("/register", status_code=201, response_model=schemas.Token)
-async def sign_up(new_user: schemas.SignUp, user_crud: UserCRUD = Depends()) -> schemas.Token:
+async def sign_up(
+        new_user: schemas.SignUp,
+        user_crud: UserCRUD = Depends(),
+        auth0_client: Auth0Client = Depends(get_auth0_client)
+) -> schemas.Token:
     email_exist = await user_crud.get_user_by_email(email=new_user.email)
     if email_exist:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    config = Config.set_up_auth0()
-    conn = http.client.HTTPSConnection(config["DOMAIN"])
-    pyload = "{" \
-             f"\"client_id\":\"{config['CLIENT_ID']}\"," \
-             f"\"client_secret\":\"{config['CLIENT_SECRET']}\"," \
-             f"\"audience\":\"{config['API_AUDIENCE']}\"," \
-             f"\"email\":\"{new_user.email}\"," \
-             f"\"password\":\"{new_user.password}\"," \
-             f"\"connection\":\"{config['CONNECTION']}\"," \
-             f"\"grant_type\":\"client_credentials\"" \
-             "}"
-    headers = {"content-type": "application/json"}
-    conn.request("POST", "/dbconnections/signup", pyload, headers)
-    conn.getresponse()
+    try:
+        await auth0_client.sign_up(email=new_user.email, password=new_user.password)
+    except Auth0Error as error:
+        raise HTTPException(status_code=400, detail=error.message)
+    except Auth0UnavailableError as error:
+        raise HTTPException(status_code=503, detail=str(error))
 
     user = await user_crud.create_user(user=new_user)
     access_token_expires = timedelta(minutes=Config.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,34 +1,43 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page, Params
 
-from src import schemas, models
-from src.crud import CompanyCRUD
-from src.database import AsyncSession, get_db_session
+from src import schemas
+from src.crud import CompanyCRUD, LeaderboardCrud
+from src.database import AsyncSession, get_db_session, UnitOfWorkRoute
+from src.pagination import CursorPage, CursorParams
 from src.routes.dependencies import get_current_user
 
 router = APIRouter(
     prefix="/company",
     tags=["company"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
 
 @router.get("/all_companies", response_model=Page[schemas.Company], status_code=status.HTTP_200_OK)
 async def get_all_companies(
-        skip: int = 0,
-        limit: int = 100,
+        params: Params = Depends(),
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.Company = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await company_crud.get_all_public_companies(params=params)
+
+
+@router.get("/all_companies/cursor", response_model=CursorPage[schemas.Company], status_code=status.HTTP_200_OK)
+async def get_all_companies_by_cursor(
+        params: CursorParams = Depends(),
+        company_crud: CompanyCRUD = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
 ):
-    companies = await company_crud.get_all_public_companies(skip=skip, limit=limit)
-    return paginate(companies)
+    return await company_crud.get_public_companies_by_cursor(params=params)
 
 
 @router.get("/my", response_model=List[schemas.Company], status_code=status.HTTP_200_OK)
 async def get_my_companies(
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> List[schemas.Company]:
     return await company_crud.get_companies_by_user_id(user_id=current_user.id)
 
@@ -39,7 +48,7 @@ async def create_company(
         company_crud: CompanyCRUD = Depends(),
         current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Company:
-    return await company_crud.create_company(company_data=company_data, user=current_user)
+    return await company_crud.create_company(company_data=company_data, user_id=current_user.id)
 
 
 @router.patch("/change_status", response_model=schemas.Company, status_code=status.HTTP_201_CREATED)
@@ -47,7 +56,7 @@ async def change_company_status(
         company_id: int,
         change_data: schemas.ChangeCompanyStatus,
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
  ) -> schemas.Company:
     return await company_crud.update_company_status(
         company_id=company_id, user_id=current_user.id, change_data=change_data
@@ -59,7 +68,7 @@ async def update_company_info(
         company_id: int,
         update_data: schemas.CompanyInfoUpdate,
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ):
     return await company_crud.update_company_info(
         company_id=company_id, user_id=current_user.id, update_data=update_data
@@ -70,9 +79,11 @@ async def update_company_info(
 async def delete_company(
         company_id: int,
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        leaderboard_crud: LeaderboardCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.CompanyDeleteResponse:
     await company_crud.delete_company(company_id=company_id, user_id=current_user.id)
+    leaderboard_crud.drop_company(company_id=company_id)
     return schemas.CompanyDeleteResponse(
         status_code=status.HTTP_200_OK,
         body="Success delete company"
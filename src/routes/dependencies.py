@@ -1,10 +1,10 @@
-from typing import Union
-from fastapi import Depends, HTTPException, Response, status
+from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 
 from src.database import AsyncSession, get_db_session
-from src import models
-from src.utils import VerifyToken
+from src import schemas
+from src.schemas.token import TokenProvider
+from src.utils import VerifyToken, TokenVerificationError
 from src.crud.crud_user import UserCRUD
 
 
@@ -12,24 +12,17 @@ token_auth_scheme = HTTPBearer()
 
 
 async def get_current_user(
-        response: Response,
         user_crud: UserCRUD = Depends(),
         token: str = Depends(token_auth_scheme)
-) -> Union[models.User, Response]:
-    pyload_from_auth = await VerifyToken(token.credentials).verify_token_from_auth0()
+) -> schemas.User:
+    try:
+        identity = await VerifyToken(token.credentials).verify()
+    except TokenVerificationError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
 
-    if pyload_from_auth.get("status"):
-        pyload_from_me = await VerifyToken(token.credentials).verify_token_from_me()
-        if pyload_from_me.get("status"):
-            response.status_code = status.HTTP_400_BAD_REQUEST
-            return response
-
-        user = await user_crud.get_user_by_email(email=pyload_from_me.get("email"))
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
-
-    user = await user_crud.get_user_by_email(email=pyload_from_auth.get("email"))
+    user = await user_crud.get_user_identity_by_email(email=identity.email)
     if not user:
-        user = await user_crud.create_user_by_email(email=pyload_from_auth.get("email"))
+        if identity.provider is not TokenProvider.auth0:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = schemas.User.from_orm(await user_crud.create_user_by_email(email=identity.email))
     return user
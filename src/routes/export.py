@@ -1,23 +1,68 @@
 from typing import List
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
 
 from src import schemas, models
-from src.crud import WorkflowCrud
-from src.database import AsyncSession, get_db_session
+from src.crud import ExportCrud, WorkflowCrud
+from src.database import AsyncSession, get_db_session, UnitOfWorkRoute
 from src.models.request import RequestStatus
 from src.routes.dependencies import get_current_user
 
 router = APIRouter(
     prefix="/export",
     tags=["data_export"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
+EXPORT_MEDIA_TYPES = {
+    schemas.ExportFormat.csv: "text/csv",
+    schemas.ExportFormat.jsonl: "application/x-ndjson",
+}
 
-@router.get("/my_quizzes_results")
+
+@router.get("/my_quizzes_results", status_code=status.HTTP_200_OK)
 async def my_quizzes_result(
+        export_format: schemas.ExportFormat = Query(schemas.ExportFormat.csv, alias="format"),
         workflow_crud: WorkflowCrud = Depends(),
         current_user: schemas.User = Depends(get_current_user)
-):
-    print(current_user)
-    await workflow_crud.export_my_quizzes_results(user_id=current_user.id)
+) -> StreamingResponse:
+    return StreamingResponse(
+        workflow_crud.export_my_quizzes_results(user_id=current_user.id, export_format=export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="my_quizzes_results.{export_format.value}"'}
+    )
+
+
+@router.post("/jobs", response_model=schemas.ExportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_company_export_job(
+        company_id: int,
+        export_crud: ExportCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+) -> schemas.ExportJob:
+    job = await export_crud.create_company_export_job(company_id=company_id, user_id=current_user.id)
+
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.ExportJob, status_code=status.HTTP_200_OK)
+async def read_export_job(
+        job_id: str,
+        export_crud: ExportCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+) -> schemas.ExportJob:
+    job = await export_crud.get_export_job(job_id=job_id, user_id=current_user.id)
+
+    return job
+
+
+@router.get("/jobs/{job_id}/parts/{part}", status_code=status.HTTP_200_OK)
+async def download_export_part(
+        job_id: str,
+        part: str,
+        export_crud: ExportCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+) -> FileResponse:
+    path = await export_crud.get_export_part_path(job_id=job_id, part=part, user_id=current_user.id)
+
+    return FileResponse(path, media_type="application/gzip", filename=part)
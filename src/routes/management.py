@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from src import schemas, models
+from src import schemas
 from src.crud import ManagementCRUD, UserCRUD, CompanyCRUD
-from src.database import AsyncSession, get_db_session
+from src.database import AsyncSession, get_db_session, UnitOfWorkRoute
 from src.models.request import RequestStatus, RequestFrom
 from src.models.worker import Role
 from src.routes.dependencies import get_current_user
@@ -10,7 +10,8 @@ from src.routes.dependencies import get_current_user
 router = APIRouter(
     prefix="/management",
     tags=["management"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
 
@@ -19,7 +20,7 @@ async def create_invite_to_company(
         company_id: int,
         user_id: int,
         management_crud: ManagementCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Response:
     await management_crud.create_invite(
         user_id=user_id, company_id=company_id, owner_id=current_user.id
@@ -35,14 +36,14 @@ async def accept_invite_to_company(
         invite_id: int,
         company_crud: CompanyCRUD = Depends(),
         management_crud: ManagementCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Response:
     result_update = await management_crud.update_invite(
         invite_id=invite_id, user_id=current_user.id, status=RequestStatus.accepted
     )
     company = await company_crud.get_company_by_id(company_id=result_update.company_id)
     await company_crud.create_worker_in_company(
-        company=company, user=current_user, role=Role.staff
+        company=company, user_id=current_user.id, role=Role.staff
     )
 
     return schemas.Response(
@@ -55,7 +56,7 @@ async def accept_invite_to_company(
 async def cancel_invite_to_company(
         invite_id: int,
         management_crud: ManagementCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Response:
     await management_crud.update_invite(
         invite_id=invite_id, user_id=current_user.id, status=RequestStatus.rejected
@@ -72,7 +73,7 @@ async def assign_admin_to_company(
         user_id: int,
         company_id: int,
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Response:
     await company_crud.update_worker_admin(
         user_id=user_id, company_id=company_id, owner_id=current_user.id, role=Role.admin
@@ -88,7 +89,7 @@ async def remove_admin_from_company(
         user_id: int,
         company_id: int,
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ):
     await company_crud.update_worker_admin(
         user_id=user_id, company_id=company_id, owner_id=current_user.id, role=Role.staff
@@ -103,7 +104,7 @@ async def remove_admin_from_company(
 async def apply_to_join_the_company(
         company_id: int,
         management_crud: ManagementCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Response:
     await management_crud.create_request(
         user_id=current_user.id, company_id=company_id
@@ -119,14 +120,14 @@ async def accept_joining_to_company(
         request_id: int,
         company_crud: CompanyCRUD = Depends(),
         management_crud: ManagementCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.Response:
     result_update = await management_crud.update_request(
         request_id=request_id, owner_id=current_user.id, status=RequestStatus.accepted
     )
     company = await company_crud.get_company_by_id(company_id=result_update.company_id)
     await company_crud.create_worker_in_company(
-        company=company, user=result_update.user, role=Role.staff
+        company=company, user_id=result_update.user_id, role=Role.staff
     )
     return schemas.Response(
         status_code=status.HTTP_201_CREATED,
@@ -138,7 +139,7 @@ async def accept_joining_to_company(
 async def cancel_joining_to_company(
         request_id: int,
         management_crud: ManagementCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ):
     await management_crud.update_request(
         request_id=request_id, owner_id=current_user.id, status=RequestStatus.rejected
@@ -154,7 +155,7 @@ async def delete_worker_from_company(
         company_id: int,
         user_id: int,
         company_crud: CompanyCRUD = Depends(),
-        current_user: models.User = Depends(get_current_user)
+        current_user: schemas.User = Depends(get_current_user)
 ):
     await company_crud.delete_worker(
         company_id=company_id, user_id=user_id, owner_id=current_user.id
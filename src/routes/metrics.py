@@ -0,0 +1,26 @@
+from fastapi import APIRouter, status
+
+from src.cache import get_cache_stats
+from src.database import get_pool_stats
+from src.security import password_hasher
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    responses={404: {"description": "Not Found"}}
+)
+
+
+@router.get("/caches", status_code=status.HTTP_200_OK)
+async def read_cache_metrics() -> dict:
+    return get_cache_stats()
+
+
+@router.get("/password_hashing", status_code=status.HTTP_200_OK)
+async def read_password_hashing_metrics() -> dict:
+    return password_hasher.stats()
+
+
+@router.get("/db_pool", status_code=status.HTTP_200_OK)
+async def read_db_pool_metrics() -> dict:
+    return get_pool_stats()
@@ -1,28 +1,39 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page, Params
 
 from src import schemas
 from src.crud import QuizCrud
+from src.database import UnitOfWorkRoute
+from src.pagination import CursorPage, CursorParams
 from src.routes.dependencies import get_current_user
 
 router = APIRouter(
     prefix="/quiz",
     tags=["quiz"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
 
 @router.get("/all_quizzes", response_model=Page[schemas.Quiz], status_code=status.HTTP_200_OK)
 async def get_all_quizzes_for_company(
         company_id: int,
-        skip: int = 0,
-        limit: int = 100,
+        params: Params = Depends(),
         quiz_crud: QuizCrud = Depends(),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    quizzes = await quiz_crud.get_all_quizzes(company_id=company_id, skip=skip, limit=limit)
-    return paginate(quizzes)
+    return await quiz_crud.get_all_quizzes(company_id=company_id, params=params)
+
+
+@router.get("/all_quizzes/cursor", response_model=CursorPage[schemas.Quiz], status_code=status.HTTP_200_OK)
+async def get_all_quizzes_for_company_by_cursor(
+        company_id: int,
+        params: CursorParams = Depends(),
+        quiz_crud: QuizCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await quiz_crud.get_quizzes_by_cursor(company_id=company_id, params=params)
 
 
 @router.post("/create", response_model=schemas.QuizResponse, status_code=status.HTTP_201_CREATED)
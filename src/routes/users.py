@@ -1,26 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page, Params
 
 from src import schemas
-from src.crud import UserCRUD
+from src.crud import CompanyCRUD, LeaderboardCrud, UserCRUD
+from src.database import UnitOfWorkRoute
+from src.pagination import CursorPage, CursorParams
 from src.routes.dependencies import get_current_user
 
 router = APIRouter(
     prefix="/users",
     tags=["users"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
 
 @router.get("/", response_model=Page[schemas.User])
 async def read_users(
-        skip: int = 0,
-        limit: int = 100,
+        params: Params = Depends(),
         user_crud: UserCRUD = Depends(),
         current_user: schemas.User = Depends(get_current_user)
 ):
-    users = await user_crud.get_users(skip=skip, limit=limit)
-    return paginate(users)
+    return await user_crud.get_users(params=params)
+
+
+@router.get("/cursor", response_model=CursorPage[schemas.User])
+async def read_users_by_cursor(
+        params: CursorParams = Depends(),
+        user_crud: UserCRUD = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+):
+    return await user_crud.get_users_by_cursor(params=params)
 
 
 @router.get("/{user_id}", response_model=schemas.User)
@@ -69,8 +79,12 @@ async def update_user_password(
 @router.delete("/delete_me", response_model=schemas.DeleteUserResponse, status_code=200)
 async def delete_user(
         user_crud: UserCRUD = Depends(),
+        leaderboard_crud: LeaderboardCrud = Depends(),
+        company_crud: CompanyCRUD = Depends(),
         current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.DeleteUserResponse:
+    await leaderboard_crud.remove_user(user_id=current_user.id)
+    await company_crud.invalidate_roles_of_user(user_id=current_user.id)
     await user_crud.delete_user(user_id=current_user.id)
 
     return schemas.DeleteUserResponse(
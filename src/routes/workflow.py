@@ -1,15 +1,17 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi_pagination import Page, paginate
 
 from src import schemas
-from src.crud import WorkflowCrud
+from src.crud import LeaderboardCrud, WorkflowCrud
+from src.database import UnitOfWorkRoute
 from src.routes.dependencies import get_current_user
 
 router = APIRouter(
     prefix="/workflow",
     tags=["workflow"],
-    responses={404: {"description": "Not Found"}}
+    responses={404: {"description": "Not Found"}},
+    route_class=UnitOfWorkRoute
 )
 
 
@@ -104,3 +106,42 @@ async def read_my_quizzes_with_time_last_test(
     my_quizzes = await workflow_crud.get_my_quizzes_with_time_of_last_test(user_id=current_user.id)
 
     return my_quizzes
+
+
+@router.get("/leaderboard/top", response_model=List[schemas.LeaderboardEntry], status_code=status.HTTP_200_OK)
+async def read_leaderboard_top(
+        company_id: int,
+        limit: int = Query(10, ge=1, le=100),
+        leaderboard_crud: LeaderboardCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+) -> List[schemas.LeaderboardEntry]:
+    top = await leaderboard_crud.get_top(company_id=company_id, limit=limit, user_id=current_user.id)
+
+    return top
+
+
+@router.get("/leaderboard/range", response_model=schemas.LeaderboardPage, status_code=status.HTTP_200_OK)
+async def read_leaderboard_range(
+        company_id: int,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=500),
+        leaderboard_crud: LeaderboardCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+) -> schemas.LeaderboardPage:
+    page = await leaderboard_crud.get_range(
+        company_id=company_id, offset=offset, limit=limit, user_id=current_user.id
+    )
+
+    return page
+
+
+@router.get("/leaderboard/rank", response_model=schemas.LeaderboardEntry, status_code=status.HTTP_200_OK)
+async def read_leaderboard_rank(
+        company_id: int,
+        user_id: int,
+        leaderboard_crud: LeaderboardCrud = Depends(),
+        current_user: schemas.User = Depends(get_current_user)
+) -> schemas.LeaderboardEntry:
+    entry = await leaderboard_crud.get_rank(company_id=company_id, worker_id=user_id, user_id=current_user.id)
+
+    return entry
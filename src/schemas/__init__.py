@@ -13,7 +13,8 @@ from .company import (
     CompanyDeleteResponse
 )
 from .auth import SignUp, SignIn
-from .token import Token
+from .token import Token, TokenProvider, TokenIdentity
+from .export import ExportFormat, ExportJobStatus, ExportJob
 from .general import UserWithCompanies, Response
 from .management import CreateInvite
 from .worker import Worker
@@ -23,5 +24,6 @@ from .quiz import (
     Quiz, CreateQuiz, Question, AnswerResponse,
     QuestionsResponse, QuizResponse, TestResponse,
     AnswersFromUser, UserGPAResponse, UserGPAQuizResponse,
-    UserWithTimeOfLastTestResponse, MyGPA, QuizWithTimeOfLastTestResponse
+    UserWithTimeOfLastTestResponse, MyGPA, QuizWithTimeOfLastTestResponse,
+    LeaderboardEntry, LeaderboardPage
 )
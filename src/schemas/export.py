@@ -0,0 +1,28 @@
+import enum
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ExportFormat(str, enum.Enum):
+    csv = "csv"
+    jsonl = "jsonl"
+
+
+class ExportJobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ExportJob(BaseModel):
+    id: str
+    company_id: int
+    status: ExportJobStatus
+    rows: int = 0
+    parts: List[str] = list()
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
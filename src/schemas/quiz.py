@@ -109,3 +109,14 @@ class MyGPA(BaseModel):
 class QuizWithTimeOfLastTestResponse(BaseModel):
     quiz_id: int
     time: datetime
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    gpa: float
+
+
+class LeaderboardPage(BaseModel):
+    items: List[LeaderboardEntry]
+    total: int
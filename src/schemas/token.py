@@ -1,3 +1,5 @@
+import enum
+
 from pydantic import BaseModel
 
 
@@ -7,3 +9,17 @@ class Token(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class TokenProvider(str, enum.Enum):
+    auth0 = "auth0"
+    local = "local"
+
+
+class TokenIdentity(BaseModel):
+    email: str
+    provider: TokenProvider
+    payload: dict
+
+    class Config:
+        allow_mutation = False
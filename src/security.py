@@ -1,4 +1,11 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
@@ -7,6 +14,69 @@ from src.config import Config
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class PasswordHasher:
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable, *args) -> Any:
+        # Admission control: bcrypt is deliberately slow, so shed load instead of queueing unboundedly
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, try again later",
+                headers={"Retry-After": "1"}
+            )
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._timed, func, *args)
+        finally:
+            self.pending -= 1
+
+    def _timed(self, func: Callable, *args) -> Any:
+        with self._lock:
+            self.running += 1
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.pending,
+            "queue_depth": max(self.pending - self.running, 0),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_hash_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_hash_seconds": self.max_seconds
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher(workers=Config.PASSWORD_HASH_WORKERS, max_queue=Config.PASSWORD_HASH_MAX_QUEUE)
+
+
 async def create_access_token(email: str, expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -20,8 +90,8 @@ async def create_access_token(email: str, expires_delta: timedelta = None) -> st
 
 
 async def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return await password_hasher.run(pwd_context.verify, password, hashed_password)
 
 
 async def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return await password_hasher.run(pwd_context.hash, password)
@@ -1,5 +1,24 @@
+import hashlib
+import time
+
 import jwt
 from src.config import Config
+from src.cache import TieredCache
+from src.jwks import jwks_cache
+from src.schemas.token import TokenIdentity, TokenProvider
+
+verified_token_cache = TieredCache(
+    namespace="verified_token",
+    maxsize=Config.TOKEN_CACHE_MAX_SIZE,
+    ttl=Config.TOKEN_CACHE_MAX_TTL_SECONDS,
+    encode=TokenIdentity.json,
+    decode=TokenIdentity.parse_raw,
+    use_redis=Config.TOKEN_CACHE_USE_REDIS
+)
+
+
+class TokenVerificationError(Exception):
+    pass
 
 
 class VerifyToken:
@@ -8,40 +27,69 @@ class VerifyToken:
         self.config = Config
         self.signing_key = None
 
-        jwks_url = f'https://{self.config.set_up_auth0()["DOMAIN"]}/.well-known/jwks.json'
-        self.jwks_client = jwt.PyJWKClient(jwks_url)
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.token.encode()).hexdigest()
 
-    async def verify_token_from_auth0(self):
-        try:
-            self.signing_key = self.jwks_client.get_signing_key_from_jwt(self.token).key
+    async def verify(self) -> TokenIdentity:
+        cached = await verified_token_cache.get(self.digest)
+        if cached and cached.payload.get("exp", 0) > time.time():
+            return cached
 
-        except jwt.exceptions.PyJWKClientError as error:
-            return {"status": "error", "msg": error.__str__()}
+        provider = self.get_provider()
+        if provider is TokenProvider.auth0:
+            payload = await self.verify_token_from_auth0()
+        else:
+            payload = await self.verify_token_from_me()
 
+        if not payload.get("email"):
+            raise TokenVerificationError("Token has no email claim")
+
+        identity = TokenIdentity(email=payload["email"], provider=provider, payload=payload)
+        # Cache until the token expires, tokens without exp are re-verified every time
+        ttl = min(payload.get("exp", 0) - time.time(), self.config.TOKEN_CACHE_MAX_TTL_SECONDS)
+        if ttl > 0:
+            await verified_token_cache.set(self.digest, identity, ttl=ttl)
+        return identity
+
+    def get_provider(self) -> TokenProvider:
+        # Unverified peek at the header and claims, only used to pick the one verifier to run
+        try:
+            header = jwt.get_unverified_header(self.token)
+            claims = jwt.decode(self.token, options={"verify_signature": False})
         except jwt.exceptions.DecodeError as error:
-            return {"status": "error", "msg": error.__str__()}
+            raise TokenVerificationError(str(error))
+
+        issuer = claims.get("iss")
+        if header.get("kid") or (issuer and issuer == self.config.AUTH0.issuer):
+            return TokenProvider.auth0
+        if header.get("alg") == self.config.ENCODE_ALGORITHM:
+            return TokenProvider.local
+        raise TokenVerificationError("Unknown token issuer")
 
+    async def verify_token_from_auth0(self) -> dict:
         try:
+            self.signing_key = (await jwks_cache.get_signing_key_from_jwt(self.token)).key
             payload = jwt.decode(
                 self.token,
                 self.signing_key,
-                algorithms=self.config.set_up_auth0()["ALGORITHMS"],
-                audience=self.config.set_up_auth0()["API_AUDIENCE"],
-                issuer=self.config.set_up_auth0()["ISSUER"],
+                algorithms=self.config.AUTH0.algorithms,
+                audience=self.config.AUTH0.api_audience,
+                issuer=self.config.AUTH0.issuer,
             )
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+        except jwt.exceptions.PyJWTError as error:
+            raise TokenVerificationError(str(error))
 
         return payload
 
-    async def verify_token_from_me(self):
+    async def verify_token_from_me(self) -> dict:
         try:
             payload = jwt.decode(
                 self.token,
                 self.config.SECRET_KEY,
                 algorithms=[self.config.ENCODE_ALGORITHM]
             )
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+        except jwt.exceptions.PyJWTError as error:
+            raise TokenVerificationError(str(error))
 
         return payload
@@ -0,0 +1,143 @@
+import pytest
+
+from src import models, schemas
+from src.cache import LRUCache, TieredCache, attach_redis, caches
+from src.crud.crud_user import UserCRUD, user_cache
+from src.database import commit_unit_of_work, rollback_unit_of_work
+from tests.conftest import FailingRedis
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def make_cache():
+    created = list()
+
+    def make(**kwargs) -> TieredCache:
+        cache = TieredCache(namespace=f"test-{len(created)}", maxsize=kwargs.pop("maxsize", 10), **kwargs)
+        created.append(cache)
+        return cache
+
+    yield make
+    for cache in created:
+        caches.remove(cache)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+async def test_local_only_set_get_delete(make_cache):
+    cache = make_cache()
+    await cache.set("key", {"value": 1})
+    assert await cache.get("key") == {"value": 1}
+
+    await cache.delete("key")
+    assert await cache.get("key") is None
+
+
+async def test_redis_tier_is_read_through_and_written_through(make_cache, redis):
+    cache = make_cache(ttl=30, use_redis=True)
+    other_process = make_cache(ttl=30, use_redis=True)
+    other_process.namespace = cache.namespace
+    cache.redis = other_process.redis = redis
+
+    await cache.set("key", [1, 2])
+    assert redis.data[f"{cache.namespace}:key"] == b"[1, 2]"
+
+    assert await other_process.get("key") == [1, 2]
+    assert other_process.redis_hits == 1
+    # Now served from its local tier
+    assert await other_process.get("key") == [1, 2]
+    assert other_process.redis_hits == 1
+
+
+async def test_delete_clears_both_tiers(make_cache, redis):
+    cache = make_cache(use_redis=True)
+    other_process = make_cache(use_redis=True)
+    other_process.namespace = cache.namespace
+    cache.redis = other_process.redis = redis
+
+    await cache.set("key", "old")
+    await cache.delete("key")
+
+    assert await cache.get("key") is None
+    assert await other_process.get("key") is None
+    assert redis.data == dict()
+
+
+async def test_redis_errors_fall_back_to_the_local_tier(make_cache):
+    cache = make_cache(use_redis=True)
+    cache.redis = FailingRedis()
+
+    await cache.set("key", "value")
+    assert await cache.get("key") == "value"
+    assert await cache.get("missing") is None
+
+    await cache.delete("key")
+    assert await cache.get("key") is None
+
+
+def test_attach_redis_only_reaches_shared_caches(make_cache, redis):
+    shared = make_cache(use_redis=True)
+    local = make_cache()
+
+    attach_redis(redis)
+    assert shared.redis is redis
+    assert local.redis is None
+
+    attach_redis(None)
+    assert shared.redis is None
+
+
+async def test_user_cache_is_dropped_only_after_commit(db):
+    user = models.User(email="user@example.com", first_name="Old")
+    db.add(user)
+    await db.commit()
+
+    user_crud = UserCRUD(db=db)
+    assert (await user_crud.get_user_identity_by_email(email=user.email)).first_name == "Old"
+
+    await user_crud.update_user_info(user_id=user.id, update_data=schemas.UserInfoUpdate(first_name="New"))
+    assert (await user_cache.get(f"email:{user.email}")).first_name == "Old"
+
+    await commit_unit_of_work(db)
+    assert await user_cache.get(f"email:{user.email}") is None
+    assert (await user_crud.get_user_identity_by_email(email=user.email)).first_name == "New"
+
+
+async def test_user_cache_is_kept_on_rollback(db):
+    user = models.User(email="user@example.com", first_name="Old")
+    db.add(user)
+    await db.commit()
+
+    email = user.email
+
+    user_crud = UserCRUD(db=db)
+    await user_crud.get_user_identity_by_email(email=email)
+    await user_crud.update_user_info(user_id=user.id, update_data=schemas.UserInfoUpdate(first_name="New"))
+    await rollback_unit_of_work(db)
+
+    assert (await user_cache.get(f"email:{email}")).first_name == "Old"
+    assert db.info.get("after_commit") is None
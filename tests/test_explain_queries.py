@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from scripts.explain_queries import Explain, lookups, record_statements, RecordingSession
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_every_lookup_records_a_statement():
+    statements = await record_statements()
+
+    names = {name.split(" [")[0] for name, _ in statements}
+    assert names == set(lookups(RecordingSession()))
+
+
+async def test_recorded_statements_compile_for_postgres():
+    for name, statement in await record_statements():
+        compiled = str(Explain(statement).compile(dialect=postgresql.asyncpg.dialect()))
+        assert compiled.startswith("EXPLAIN (FORMAT JSON) SELECT "), name
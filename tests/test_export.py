@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from src import models, schemas
+from src.crud.crud_workflow import EXPORT_COLUMNS, answers_key
+from tests.test_scoring import make_workflow, seed_quiz
+
+pytestmark = pytest.mark.anyio
+
+
+async def export(workflow, user_id: int, export_format: schemas.ExportFormat) -> str:
+    return "".join([chunk async for chunk in workflow.export_my_quizzes_results(
+        user_id=user_id, export_format=export_format
+    )])
+
+
+@pytest.fixture
+async def history(db, redis):
+    # Two attempts at the same quiz; Redis only remembers the answers of the second
+    user, company, quiz, answer_key = await seed_quiz(db)
+    general_result = models.GeneralResult(user_id=user.id, company_id=company.id)
+    db.add(general_result)
+    await db.flush()
+    older = models.QuizResult(
+        quiz_id=quiz.id, general_result_id=general_result.id, correct_answers=0, number_of_questions=2, gpa=0.0,
+        date_of_passage=datetime(2026, 10, 1)
+    )
+    db.add(older)
+    await db.flush()
+    latest = models.QuizResult(
+        quiz_id=quiz.id, general_result_id=general_result.id, correct_answers=2, number_of_questions=2, gpa=1.0,
+        date_of_passage=datetime(2026, 10, 2)
+    )
+    db.add(latest)
+    await db.commit()
+
+    await redis.hset(answers_key(user.id), mapping={
+        question_id: right for question_id, (right, _) in answer_key.items()
+    })
+    return user, older, latest, answer_key
+
+
+async def test_only_the_latest_attempt_carries_answers(db, redis, history):
+    user, older, latest, answer_key = history
+
+    lines = (await export(make_workflow(db, redis), user.id, schemas.ExportFormat.jsonl)).splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert [(record["quiz_result_id"], record["answer_id"]) for record in records] == [
+        (older.id, None),
+        (older.id, None),
+        *((latest.id, right) for right, _ in answer_key.values())
+    ]
+
+
+async def test_csv_has_a_header_and_empty_answers_for_older_attempts(db, redis, history):
+    user, older, latest, _ = history
+
+    rows = list(csv.DictReader(io.StringIO(await export(make_workflow(db, redis), user.id, schemas.ExportFormat.csv))))
+
+    assert list(rows[0]) == list(EXPORT_COLUMNS)
+    assert {row["answer_id"] for row in rows if row["quiz_result_id"] == str(older.id)} == {""}
+    assert all(row["answer_id"] for row in rows if row["quiz_result_id"] == str(latest.id))
@@ -0,0 +1,92 @@
+"""The export worker's queue handling: what survives a failure and what is left behind."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import aioredis
+import pytest
+
+from src import schemas
+from src.config import Config
+from src.export_worker import (
+    EXPORT_PROCESSING_KEY, EXPORT_QUEUE_KEY, ExportWorker, decode_export_job, export_job_key
+)
+from tests.conftest import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+class DrainingRedis(FakeRedis):
+    # Stops the worker's loop once the queue is empty, instead of polling forever
+
+    def __init__(self, failing_job_id: str):
+        super().__init__()
+        self.failing_job_id = failing_job_id
+
+    async def brpoplpush(self, src: str, dst: str, timeout: int = 0):
+        value = await super().brpoplpush(src, dst, timeout)
+        if value is None:
+            raise asyncio.CancelledError()
+        return value
+
+    async def hgetall(self, key: str):
+        if key == export_job_key(self.failing_job_id):
+            raise aioredis.RedisError("down")
+        return await super().hgetall(key)
+
+
+async def seed_job(redis: FakeRedis, job_id: str, status: str, updated_at: datetime):
+    await redis.hset(export_job_key(job_id), mapping={
+        "company_id": 1,
+        "user_id": 1,
+        "status": status,
+        "rows": 0,
+        "parts": "[]",
+        "created_at": updated_at.isoformat(),
+        "updated_at": updated_at.isoformat()
+    })
+
+
+async def job_status(redis: FakeRedis, job_id: str) -> schemas.ExportJobStatus:
+    return decode_export_job(job_id, await redis.hgetall(export_job_key(job_id))).status
+
+
+async def test_a_failing_job_does_not_stop_the_worker():
+    redis = DrainingRedis(failing_job_id="broken")
+    now = datetime.now(timezone.utc)
+    await seed_job(redis, "broken", schemas.ExportJobStatus.queued.value, now)
+    await seed_job(redis, "fine", schemas.ExportJobStatus.queued.value, now)
+    await redis.lpush(EXPORT_QUEUE_KEY, "broken", "fine")
+
+    exported = list()
+
+    async def export(job: schemas.ExportJob):
+        exported.append(job.id)
+
+    worker = ExportWorker(poll_timeout=0)
+    worker.redis = redis
+    worker.export = export
+    with pytest.raises(asyncio.CancelledError):
+        await worker.run()
+
+    assert exported == ["fine"]
+    assert await job_status(redis, "fine") == schemas.ExportJobStatus.done
+    # Its status was never written, so it stays for the abandoned job sweep
+    assert await redis.lrange(EXPORT_PROCESSING_KEY, 0, -1) == [b"broken"]
+
+
+async def test_abandoned_jobs_are_failed_and_fresh_ones_left_running(redis):
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=Config.EXPORT_JOB_STALE_SECONDS + 60)
+    await seed_job(redis, "abandoned", schemas.ExportJobStatus.running.value, stale)
+    await seed_job(redis, "running", schemas.ExportJobStatus.running.value, now)
+    await redis.lpush(EXPORT_PROCESSING_KEY, "abandoned", "running", "expired")
+
+    worker = ExportWorker()
+    worker.redis = redis
+    await worker.fail_abandoned_jobs()
+
+    abandoned = decode_export_job("abandoned", await redis.hgetall(export_job_key("abandoned")))
+    assert abandoned.status == schemas.ExportJobStatus.failed
+    assert abandoned.error == "The export worker stopped while running it"
+    assert await job_status(redis, "running") == schemas.ExportJobStatus.running
+    assert await redis.lrange(EXPORT_PROCESSING_KEY, 0, -1) == [b"running"]
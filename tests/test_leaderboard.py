@@ -0,0 +1,151 @@
+"""Company leaderboards: what reaches the sorted set and how ranks are read back from it."""
+import pytest
+from fastapi import HTTPException
+
+from scripts.rebuild_leaderboards import write_board
+from src import models, schemas
+from src.crud import CompanyCRUD, LeaderboardCrud
+from src.crud.crud_leaderboard import leaderboard_key
+from src.database import commit_unit_of_work
+from src.models.worker import Role
+from tests.test_scoring import answers, make_workflow, seed_quiz
+
+pytestmark = pytest.mark.anyio
+
+OWNER_ID = 1
+
+
+@pytest.fixture
+async def company(db) -> models.Company:
+    owner = models.User(id=OWNER_ID, email="owner@example.com")
+    company = models.Company(title="Company")
+    db.add_all([owner, company])
+    await db.flush()
+    db.add(models.Worker(user_id=owner.id, company_id=company.id, role=Role.owner))
+    await db.commit()
+    return company
+
+
+def make_leaderboard(db, redis) -> LeaderboardCrud:
+    return LeaderboardCrud(db=db, redis=redis, company_crud=CompanyCRUD(db=db, redis=redis))
+
+
+async def fill_board(db, redis, company_id: int, scores):
+    leaderboard = make_leaderboard(db, redis)
+    for user_id, gpa in scores.items():
+        leaderboard.set_score(company_id=company_id, user_id=user_id, gpa=gpa)
+    await commit_unit_of_work(db)
+    return leaderboard
+
+
+async def test_scores_reach_the_board_only_once_committed(db, redis, company):
+    leaderboard = make_leaderboard(db, redis)
+    leaderboard.set_score(company_id=company.id, user_id=10, gpa=0.5)
+    assert leaderboard_key(company.id) not in redis.zsets
+
+    await commit_unit_of_work(db)
+    leaderboard.set_score(company_id=company.id, user_id=10, gpa=0.75)
+    await commit_unit_of_work(db)
+    assert redis.zsets[leaderboard_key(company.id)] == {b"10": 0.75}
+
+
+async def test_top_is_ranked_by_gpa(db, redis, company):
+    leaderboard = await fill_board(db, redis, company.id, {10: 0.5, 11: 0.9, 12: 0.7})
+
+    top = await leaderboard.get_top(company_id=company.id, limit=2, user_id=OWNER_ID)
+    assert top == [
+        schemas.LeaderboardEntry(rank=1, user_id=11, gpa=0.9),
+        schemas.LeaderboardEntry(rank=2, user_id=12, gpa=0.7)
+    ]
+
+
+async def test_range_numbers_ranks_from_the_offset(db, redis, company):
+    leaderboard = await fill_board(db, redis, company.id, {10: 0.5, 11: 0.9, 12: 0.7, 13: 0.1})
+
+    page = await leaderboard.get_range(company_id=company.id, offset=1, limit=2, user_id=OWNER_ID)
+    assert page.total == 4
+    assert [(entry.rank, entry.user_id) for entry in page.items] == [(2, 12), (3, 10)]
+
+    page = await leaderboard.get_range(company_id=company.id, offset=4, limit=2, user_id=OWNER_ID)
+    assert (page.items, page.total) == ([], 4)
+
+
+async def test_rank_of_a_user(db, redis, company):
+    leaderboard = await fill_board(db, redis, company.id, {10: 0.5, 11: 0.9, 12: 0.7})
+
+    entry = await leaderboard.get_rank(company_id=company.id, worker_id=10, user_id=OWNER_ID)
+    assert entry == schemas.LeaderboardEntry(rank=3, user_id=10, gpa=0.5)
+
+    with pytest.raises(HTTPException) as error:
+        await leaderboard.get_rank(company_id=company.id, worker_id=99, user_id=OWNER_ID)
+    assert error.value.status_code == 404
+
+
+async def test_only_owners_and_admins_read_the_board(db, redis, company):
+    leaderboard = await fill_board(db, redis, company.id, {10: 0.5})
+
+    with pytest.raises(HTTPException) as error:
+        await leaderboard.get_top(company_id=company.id, limit=10, user_id=10)
+    assert error.value.status_code == 404
+
+
+async def test_removed_user_leaves_every_board(db, redis, company):
+    other = models.Company(title="Other")
+    user = models.User(email="user@example.com")
+    db.add_all([other, user])
+    await db.flush()
+    db.add_all([
+        models.GeneralResult(user_id=user.id, company_id=company.id, gpa=0.5),
+        models.GeneralResult(user_id=user.id, company_id=other.id, gpa=0.5)
+    ])
+    await db.commit()
+    user_id = user.id
+    for company_id in (company.id, other.id):
+        await fill_board(db, redis, company_id, {user_id: 0.5, 99: 0.1})
+
+    await make_leaderboard(db, redis).remove_user(user_id=user_id)
+    assert await redis.zscore(leaderboard_key(other.id), user_id) == 0.5
+
+    await commit_unit_of_work(db)
+    assert redis.zsets[leaderboard_key(company.id)] == {b"99": 0.1}
+    assert redis.zsets[leaderboard_key(other.id)] == {b"99": 0.1}
+
+
+async def test_dropped_company_loses_its_board(db, redis, company):
+    leaderboard = await fill_board(db, redis, company.id, {10: 0.5})
+
+    leaderboard.drop_company(company_id=company.id)
+    await commit_unit_of_work(db)
+    assert leaderboard_key(company.id) not in redis.zsets
+
+
+async def test_rebuild_replaces_the_board_in_one_rename(redis):
+    key = leaderboard_key(1)
+    await redis.zadd(key, {10: 0.5, 11: 0.9})
+    redis.calls.clear()
+
+    await write_board(redis, 1, {11: 0.6, 12: 0.8, 13: 0.2}, batch=2)
+    assert redis.zsets[key] == {b"11": 0.6, b"12": 0.8, b"13": 0.2}
+    assert f"{key}:rebuild" not in redis.zsets
+
+    # The live board is only touched by the swap, never member by member
+    assert [call for call in redis.calls if key in call[1:]] == [("rename", f"{key}:rebuild", key)]
+
+
+async def test_committed_submission_lands_on_the_board(postgres_db, redis):
+    db = postgres_db
+    user, company, quiz, answer_key = await seed_quiz(db)
+    (first, (first_right, _)), (second, (_, second_wrong)) = answer_key.items()
+    db.add(models.Worker(user_id=user.id, company_id=company.id, role=Role.owner))
+    await db.commit()
+    user_id, company_id = user.id, company.id
+
+    await make_workflow(db, redis).create_general_result_for_user(
+        answers_from_user=answers((first, first_right), (second, second_wrong)),
+        quiz_id=quiz.id, company_id=company_id, user_id=user_id
+    )
+    assert leaderboard_key(company_id) not in redis.zsets
+
+    await commit_unit_of_work(db)
+    entry = await make_leaderboard(db, redis).get_rank(company_id=company_id, worker_id=user_id, user_id=user_id)
+    assert entry == schemas.LeaderboardEntry(rank=1, user_id=user_id, gpa=0.5)
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from src import models
+from src.pagination import CursorParams, decode_cursor, encode_cursor, paginate_by_keyset
+
+pytestmark = pytest.mark.anyio
+
+KEYS = (models.User.date_created, models.User.id)
+START = datetime(2026, 1, 1)
+
+
+def params(cursor=None, size=2, include_total=False) -> CursorParams:
+    return CursorParams(cursor=cursor, size=size, include_total=include_total)
+
+
+@pytest.fixture
+async def users(db):
+    # Pairs of users share a creation time, so the id has to break the tie
+    users = [
+        models.User(email=f"user-{number}@example.com", date_created=START + timedelta(minutes=number // 2))
+        for number in range(7)
+    ]
+    db.add_all(users)
+    await db.commit()
+    return sorted(users, key=lambda user: (user.date_created, user.id))
+
+
+def test_cursor_round_trips_datetimes_and_ids():
+    cursor = encode_cursor([START, 42])
+    assert decode_cursor(cursor, KEYS) == [START, 42]
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1]), encode_cursor(["yesterday", 1]), "e30="])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, KEYS)
+    assert error.value.status_code == 400
+
+
+async def test_pages_cover_every_row_once_in_key_order(db, users):
+    seen = list()
+    cursor = None
+    while True:
+        page = await paginate_by_keyset(db, select(models.User), keys=KEYS, params=params(cursor), count_key="users")
+        seen.extend(user.id for user in page.items)
+        assert len(page.items) <= 2
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [user.id for user in users]
+
+
+async def test_last_full_page_has_no_next_cursor(db, users):
+    page = await paginate_by_keyset(
+        db, select(models.User), keys=KEYS, params=params(size=len(users)), count_key="users"
+    )
+    assert len(page.items) == len(users)
+    assert page.next_cursor is None
+
+
+async def test_filters_apply_to_every_page(db, users):
+    query = select(models.User).filter(models.User.date_created > START)
+    page = await paginate_by_keyset(db, query, keys=KEYS, params=params(size=10), count_key="later_users")
+    assert [user.id for user in page.items] == [user.id for user in users if user.date_created > START]
+
+
+async def test_total_is_counted_once_and_cached(db, users, statements):
+    statements.reset()
+    first = await paginate_by_keyset(
+        db, select(models.User), keys=KEYS, params=params(include_total=True), count_key="users"
+    )
+    assert first.estimated_total == len(users)
+    assert len(statements) == 2
+
+    statements.reset()
+    second = await paginate_by_keyset(
+        db, select(models.User), keys=KEYS, params=params(cursor=first.next_cursor, include_total=True),
+        count_key="users"
+    )
+    assert second.estimated_total == len(users)
+    assert len(statements) == 1
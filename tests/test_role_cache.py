@@ -0,0 +1,107 @@
+import pytest
+from fastapi import HTTPException
+
+from src import models
+from src.crud import CompanyCRUD
+from src.crud.crud_company import role_key, role_version_key
+from src.database import commit_unit_of_work
+from src.models.worker import Role
+from tests.conftest import FailingRedis
+
+pytestmark = pytest.mark.anyio
+
+OWNER_ID = 1
+STAFF_ID = 2
+
+
+@pytest.fixture
+async def company(db) -> models.Company:
+    owner = models.User(id=OWNER_ID, email="owner@example.com")
+    staff = models.User(id=STAFF_ID, email="staff@example.com")
+    company = models.Company(title="Company")
+    db.add_all([owner, staff, company])
+    await db.flush()
+    db.add_all([
+        models.Worker(user_id=owner.id, company_id=company.id, role=Role.owner),
+        models.Worker(user_id=staff.id, company_id=company.id, role=Role.staff)
+    ])
+    await db.commit()
+    return company
+
+
+async def is_owner_or_admin(company_crud: CompanyCRUD, company_id: int, user_id: int) -> bool:
+    try:
+        await company_crud.check_owner_or_admin(company_id=company_id, user_id=user_id)
+    except HTTPException as error:
+        assert error.status_code == 404
+        return False
+    return True
+
+
+async def test_answers_are_cached_under_the_current_version(db, redis, statements, company):
+    company_crud = CompanyCRUD(db=db, redis=redis)
+
+    statements.reset()
+    assert await is_owner_or_admin(company_crud, company.id, user_id=OWNER_ID)
+    assert not await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+    assert len(statements) == 2
+
+    statements.reset()
+    assert await is_owner_or_admin(company_crud, company.id, user_id=OWNER_ID)
+    assert not await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+    assert len(statements) == 0
+    assert redis.data[role_key(company.id, 0, OWNER_ID)] == b"1"
+    assert redis.data[role_key(company.id, 0, STAFF_ID)] == b"0"
+
+
+async def test_role_change_is_seen_once_committed(db, redis, company):
+    company_crud = CompanyCRUD(db=db, redis=redis)
+    assert not await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+
+    await company_crud.update_worker_admin(user_id=STAFF_ID, company_id=company.id, owner_id=OWNER_ID, role=Role.admin)
+    assert not await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+
+    await commit_unit_of_work(db)
+    assert redis.data[role_version_key(company.id)] == b"1"
+    assert await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+
+
+async def test_removed_worker_loses_access(db, redis, company):
+    company_crud = CompanyCRUD(db=db, redis=redis)
+    await company_crud.update_worker_admin(user_id=STAFF_ID, company_id=company.id, owner_id=OWNER_ID, role=Role.admin)
+    await commit_unit_of_work(db)
+    assert await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+
+    await company_crud.delete_worker(company_id=company.id, user_id=STAFF_ID, owner_id=OWNER_ID)
+    await commit_unit_of_work(db)
+    assert not await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
+
+
+async def test_entry_written_under_an_old_version_is_never_read(db, redis, company):
+    # A reader that looked up version 0 before a change committed can still store its answer late
+    redis.data[role_version_key(company.id)] = b"1"
+    redis.data[role_key(company.id, 0, STAFF_ID)] = b"1"
+
+    assert not await is_owner_or_admin(CompanyCRUD(db=db, redis=redis), company.id, user_id=STAFF_ID)
+
+
+async def test_deleting_a_user_bumps_every_company_they_worked_in(db, redis, company):
+    other = models.Company(title="Other")
+    db.add(other)
+    await db.flush()
+    db.add(models.Worker(user_id=STAFF_ID, company_id=other.id, role=Role.admin))
+    await db.commit()
+
+    company_crud = CompanyCRUD(db=db, redis=redis)
+    await company_crud.invalidate_roles_of_user(user_id=STAFF_ID)
+    await commit_unit_of_work(db)
+
+    assert redis.data[role_version_key(company.id)] == b"1"
+    assert redis.data[role_version_key(other.id)] == b"1"
+
+
+async def test_redis_errors_fall_back_to_the_database(db, company):
+    company_crud = CompanyCRUD(db=db, redis=FailingRedis())
+
+    assert await is_owner_or_admin(company_crud, company.id, user_id=OWNER_ID)
+    assert not await is_owner_or_admin(company_crud, company.id, user_id=STAFF_ID)
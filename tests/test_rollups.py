@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from src import models
+from src.config import Config
+from src.models.quiz import RollupGranularity
+from src.rollups import compact_rollups, compaction_cutoff, in_window, rollup_gpa
+
+pytestmark = pytest.mark.anyio
+
+HOUR = RollupGranularity.hour
+DAY = RollupGranularity.day
+
+
+def bucket(granularity: RollupGranularity, bucket_start: datetime, correct_answers: int = 1, **kwargs):
+    return models.GPARollup(
+        company_id=kwargs.get("company_id", 1), user_id=kwargs.get("user_id", 1), quiz_id=kwargs.get("quiz_id", 1),
+        granularity=granularity, bucket_start=bucket_start, attempts=1,
+        correct_answers=correct_answers, number_of_questions=kwargs.get("number_of_questions", 2)
+    )
+
+
+async def window_totals(db, since: datetime):
+    result = await db.execute(select(
+        func.sum(models.GPARollup.attempts), func.sum(models.GPARollup.correct_answers)
+    ).filter(in_window(since)))
+    return tuple(result.one())
+
+
+async def test_window_is_hour_precise_for_hourly_buckets_and_day_precise_for_daily(db):
+    db.add_all([
+        bucket(DAY, datetime(2026, 10, 9)),
+        bucket(DAY, datetime(2026, 10, 10)),
+        bucket(HOUR, datetime(2026, 10, 10, 13)),
+        bucket(HOUR, datetime(2026, 10, 10, 14)),
+        bucket(HOUR, datetime(2026, 10, 11, 9)),
+    ])
+    await db.commit()
+
+    result = await db.execute(select(
+        models.GPARollup.granularity, models.GPARollup.bucket_start
+    ).filter(in_window(datetime(2026, 10, 10, 14, 30))).order_by(models.GPARollup.bucket_start))
+    assert result.all() == [
+        (DAY, datetime(2026, 10, 10)),
+        (HOUR, datetime(2026, 10, 10, 14)),
+        (HOUR, datetime(2026, 10, 11, 9)),
+    ]
+
+
+async def test_rollup_gpa_is_null_without_questions(db):
+    db.add_all([
+        bucket(HOUR, datetime(2026, 10, 10, 1), correct_answers=1, user_id=1),
+        bucket(HOUR, datetime(2026, 10, 10, 2), correct_answers=2, user_id=1),
+        bucket(HOUR, datetime(2026, 10, 10, 1), correct_answers=0, user_id=2, number_of_questions=0),
+    ])
+    await db.commit()
+
+    result = await db.execute(select(
+        models.GPARollup.user_id, rollup_gpa()
+    ).group_by(models.GPARollup.user_id).order_by(models.GPARollup.user_id))
+    assert result.all() == [(1, 0.75), (2, None)]
+
+
+def test_compaction_cutoff_is_a_whole_day_behind_the_retention(monkeypatch):
+    monkeypatch.setattr(Config, "GPA_ROLLUP_HOURLY_RETENTION_HOURS", 48)
+
+    assert compaction_cutoff(datetime(2026, 10, 10, 5, 30)) == datetime(2026, 10, 8)
+    assert compaction_cutoff(datetime(2026, 10, 10, 0, 0)) == datetime(2026, 10, 8)
+
+
+async def test_compaction_folds_old_hours_into_their_days(postgres_db):
+    db = postgres_db
+    db.add_all([models.User(id=1, email="user@example.com"), models.Company(id=1, title="Company")])
+    await db.flush()
+    db.add_all([
+        bucket(DAY, datetime(2026, 10, 6), correct_answers=2),
+        bucket(HOUR, datetime(2026, 10, 6, 10), correct_answers=1),
+        bucket(HOUR, datetime(2026, 10, 6, 23), correct_answers=1),
+        bucket(HOUR, datetime(2026, 10, 7, 8), correct_answers=0),
+        bucket(HOUR, datetime(2026, 10, 8, 1), correct_answers=2),
+    ])
+    await db.commit()
+    before = await window_totals(db, datetime(2026, 10, 6))
+
+    compacted = await compact_rollups(db, cutoff=datetime(2026, 10, 8))
+    await db.commit()
+
+    assert compacted == 2
+    result = await db.execute(select(
+        models.GPARollup.granularity, models.GPARollup.bucket_start,
+        models.GPARollup.attempts, models.GPARollup.correct_answers, models.GPARollup.number_of_questions
+    ).order_by(models.GPARollup.bucket_start, models.GPARollup.granularity))
+    assert result.all() == [
+        (DAY, datetime(2026, 10, 6), 3, 4, 6),
+        (DAY, datetime(2026, 10, 7), 1, 0, 2),
+        (HOUR, datetime(2026, 10, 8, 1), 1, 2, 2),
+    ]
+    assert await window_totals(db, datetime(2026, 10, 6)) == before
+
+    assert await compact_rollups(db, cutoff=datetime(2026, 10, 8)) == 0
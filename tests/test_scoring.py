@@ -0,0 +1,130 @@
+from typing import Dict, Tuple
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from src import models, schemas
+from src.crud import CompanyCRUD, LeaderboardCrud, QuizCrud, UserCRUD, WorkflowCrud
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_quiz(db, questions: int = 2) -> Tuple[models.User, models.Company, models.Quiz, Dict[int, Tuple[int, int]]]:
+    # Returns the answer key as question_id -> (correct answer_id, wrong answer_id)
+    user = models.User(email="user@example.com")
+    company = models.Company(title="Company")
+    db.add_all([user, company])
+    await db.flush()
+    quiz = models.Quiz(company_id=company.id, title="Quiz", passing_frequency=1, number_of_questions=questions)
+    db.add(quiz)
+    await db.flush()
+
+    answer_key = dict()
+    for number in range(questions):
+        question = models.Question(quiz_id=quiz.id, question=f"Question {number}")
+        db.add(question)
+        await db.flush()
+        correct = models.Answer(question_id=question.id, answer="right", is_correct=True)
+        wrong = models.Answer(question_id=question.id, answer="wrong", is_correct=False)
+        db.add_all([correct, wrong])
+        await db.flush()
+        answer_key[question.id] = (correct.id, wrong.id)
+    await db.commit()
+    return user, company, quiz, answer_key
+
+
+def make_workflow(db, redis) -> WorkflowCrud:
+    company_crud = CompanyCRUD(db=db, redis=redis)
+    return WorkflowCrud(
+        db=db,
+        redis=redis,
+        quiz_crud=QuizCrud(db=db, company_crud=company_crud),
+        company_crud=company_crud,
+        user_crud=UserCRUD(db=db),
+        leaderboard_crud=LeaderboardCrud(db=db, redis=redis, company_crud=company_crud)
+    )
+
+
+def answers(*pairs: Tuple[int, int]):
+    return [schemas.AnswersFromUser(question_id=question_id, answer_id=answer_id) for question_id, answer_id in pairs]
+
+
+async def test_each_question_counts_once_by_its_first_answer(db, redis):
+    _, _, quiz, answer_key = await seed_quiz(db)
+    (first, (first_right, first_wrong)), (second, (second_right, _)) = answer_key.items()
+
+    _, correct_answers = await make_workflow(db, redis).score_submission(
+        answers_from_user=answers(
+            (first, first_wrong), (first, first_right), (second, second_right), (second, second_right)
+        ),
+        quiz_id=quiz.id
+    )
+    assert correct_answers == 1
+
+
+async def test_answers_to_other_quizzes_do_not_count(db, redis):
+    _, _, quiz, answer_key = await seed_quiz(db)
+    question_id, (right, _) = next(iter(answer_key.items()))
+
+    _, correct_answers = await make_workflow(db, redis).score_submission(
+        answers_from_user=answers((question_id, right), (question_id + 100, right)), quiz_id=quiz.id
+    )
+    assert correct_answers == 1
+
+
+async def test_correct_answers_are_clamped_to_the_number_of_questions(db, redis):
+    _, _, quiz, answer_key = await seed_quiz(db)
+    quiz.number_of_questions = 1
+    await db.commit()
+
+    _, correct_answers = await make_workflow(db, redis).score_submission(
+        answers_from_user=answers(*((question_id, right) for question_id, (right, _) in answer_key.items())),
+        quiz_id=quiz.id
+    )
+    assert correct_answers == 1
+
+
+async def test_a_quiz_without_questions_cannot_be_scored(db, redis):
+    _, _, quiz, _ = await seed_quiz(db, questions=0)
+
+    with pytest.raises(HTTPException) as error:
+        await make_workflow(db, redis).score_submission(answers_from_user=list(), quiz_id=quiz.id)
+    assert error.value.status_code == 400
+
+
+async def test_running_totals_follow_every_submission(postgres_db, redis):
+    db = postgres_db
+    user, company, quiz, answer_key = await seed_quiz(db)
+    (first, (first_right, _)), (second, (second_right, second_wrong)) = answer_key.items()
+    workflow = make_workflow(db, redis)
+
+    created = await workflow.create_general_result_for_user(
+        answers_from_user=answers((first, first_right), (second, second_wrong)),
+        quiz_id=quiz.id, company_id=company.id, user_id=user.id
+    )
+    await db.commit()
+    assert (created.correct_answers, created.gpa) == (1, 0.5)
+
+    updated = await workflow.update_general_result_for_user(
+        answers_from_user=answers((first, first_right), (second, second_right)),
+        quiz_id=quiz.id, company_id=company.id, user_id=user.id
+    )
+    await db.commit()
+    assert (updated.correct_answers, updated.gpa) == (2, 0.75)
+
+    general_result = await workflow.get_general_result_by_user_and_company_id(user_id=user.id, company_id=company.id)
+    await db.refresh(general_result)
+    assert (general_result.correct_answers, general_result.number_of_questions, general_result.gpa) == (3, 4, 0.75)
+
+    result = await db.execute(select(models.QuizResult.correct_answers, models.QuizResult.gpa).filter(
+        models.QuizResult.general_result_id == general_result.id
+    ).order_by(models.QuizResult.id))
+    assert result.all() == [(1, 0.5), (2, 1.0)]
+
+    result = await db.execute(select(
+        func.sum(models.GPARollup.attempts),
+        func.sum(models.GPARollup.correct_answers),
+        func.sum(models.GPARollup.number_of_questions)
+    ).filter(models.GPARollup.user_id == user.id))
+    assert tuple(result.one()) == (2, 3, 4)
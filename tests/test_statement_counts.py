@@ -0,0 +1,84 @@
+"""How many SQL statements each endpoint issues, with authentication stubbed out.
+
+Relationships are lazy='raise', so these counts only move when a query is added
+to an endpoint on purpose. The tenant is seeded with several workers, quizzes and
+requests to make a count that grows with tenant size show up as a failure.
+"""
+import httpx
+import pytest
+from fastapi import Request
+
+from src import models, schemas
+from src.database import get_db_session
+from src.main import app
+from src.models.request import RequestFrom, RequestStatus
+from src.models.worker import Role
+from src.resources import get_redis
+from src.routes.dependencies import get_current_user
+
+pytestmark = pytest.mark.anyio
+
+TENANT_SIZE = 5
+
+
+@pytest.fixture
+async def owner(db) -> models.User:
+    owner = models.User(email="owner@example.com", first_name="Owner", last_name="Owner")
+    company = models.Company(title="Company", description="Company")
+    db.add_all([owner, company])
+    await db.flush()
+
+    db.add(models.Worker(user_id=owner.id, company_id=company.id, role=Role.owner))
+    for number in range(TENANT_SIZE):
+        user = models.User(email=f"user-{number}@example.com", first_name="User", last_name="User")
+        db.add(user)
+        await db.flush()
+        db.add_all([
+            models.Worker(user_id=user.id, company_id=company.id, role=Role.staff),
+            models.Request(
+                user_id=user.id, company_id=company.id, request_from=RequestFrom.user, status=RequestStatus.pending
+            ),
+            models.Quiz(
+                company_id=company.id, title=f"Quiz {number}", description="Quiz", passing_frequency=1,
+                number_of_questions=0
+            )
+        ])
+    await db.commit()
+    return owner
+
+
+@pytest.fixture
+async def client(session_factory, redis, owner):
+    async def override_db_session(request: Request):
+        async with session_factory() as session:
+            request.state.db_session = session
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    app.dependency_overrides[get_redis] = lambda: redis
+    app.dependency_overrides[get_current_user] = lambda: schemas.User.from_orm(owner)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("method, url, body, expected", [
+    ("GET", "/users/1", None, 1),
+    ("GET", "/users/?page=1&size=10", None, 2),
+    ("GET", "/users/cursor?size=10", None, 1),
+    ("GET", "/company/my", None, 1),
+    ("GET", "/company/all_companies?page=1&size=10", None, 2),
+    ("GET", "/company/all_companies/cursor?size=10", None, 1),
+    ("GET", "/quiz/all_quizzes?company_id=1&page=1&size=10", None, 2),
+    ("GET", "/quiz/all_quizzes/cursor?company_id=1&size=10", None, 1),
+    ("GET", "/notifications/invitations", None, 1),
+    ("GET", "/notifications/request_to_company", None, 1),
+    ("GET", "/workflow/my_quizzes_with_time_last_test", None, 1),
+    ("GET", "/workflow/users_with_time_last_test?company_id=1", None, 2),
+    ("PATCH", "/company/update_info?company_id=1", {"title": "Renamed", "description": "Renamed"}, 3),
+])
+async def test_statements_per_endpoint(client, statements, method, url, body, expected):
+    statements.reset()
+    response = await client.request(method, url, json=body)
+    assert response.is_success, response.text
+    assert len(statements) == expected, statements.statements